@@ -1,3 +1,6 @@
 #!/bin/sh
+# Full logs for local games, see hlt/logs.py
+export HALITE_LOG_LEVEL="${HALITE_LOG_LEVEL:-DEBUG}"
+export HALITE_LOG_MODE="${HALITE_LOG_MODE:-file}"
 
 ./halite --seed 1542619241 --replay-directory replays/ --turn-limit 500 -vvv --width 32 --height 32 "python3 MyBot.py" "python3 alternative_bot.py"
@@ -0,0 +1,186 @@
+import time
+
+import numpy as np
+
+from .logs import get_logger
+
+logger = get_logger(__name__)
+
+
+def min_cost_assignment(costs):
+    """
+    Optimal assignment of rows to columns with the Hungarian method
+    (shortest augmenting paths with potentials), one row at a time.
+    :param costs: (rows, columns) cost matrix with rows <= columns
+    :return: Array with the column assigned to every row
+    """
+    rows, columns = costs.shape
+    row_potential = np.zeros(rows + 1)
+    column_potential = np.zeros(columns + 1)
+    # Row (1-based) matched to every column (1-based), 0 for none; column 0 is the root
+    matched = np.zeros(columns + 1, dtype=np.int64)
+    way = np.zeros(columns + 1, dtype=np.int64)
+    for row in range(1, rows + 1):
+        matched[0] = row
+        column = 0
+        min_slack = np.full(columns + 1, np.inf)
+        used = np.zeros(columns + 1, dtype=bool)
+        while matched[column] != 0:
+            used[column] = True
+            current_row = matched[column]
+            slack = costs[current_row - 1] - row_potential[current_row] - column_potential[1:]
+            improved = ~used[1:] & (slack < min_slack[1:])
+            min_slack[1:][improved] = slack[improved]
+            way[1:][improved] = column
+            free_slack = np.where(used[1:], np.inf, min_slack[1:])
+            next_column = int(free_slack.argmin()) + 1
+            delta = free_slack[next_column - 1]
+            row_potential[matched[used]] += delta
+            column_potential[used] -= delta
+            min_slack[~used] -= delta
+            column = next_column
+        # Flip the augmenting path
+        while column:
+            previous = way[column]
+            matched[column] = matched[previous]
+            column = previous
+    assignment = np.full(rows, -1, dtype=np.int64)
+    assigned_columns = np.flatnonzero(matched[1:]) + 1
+    assignment[matched[assigned_columns] - 1] = assigned_columns - 1
+    return assignment
+
+
+def auction_assignment(costs, time_limit, epsilon=None):
+    """
+    Near optimal assignment of rows to columns with the auction algorithm.
+    Prices start at zero and only columns that hold a row ever rise, which
+    keeps it exact with more columns than rows. Stops bidding once the time
+    limit is hit, leaving the rows that hold no column at that point
+    unassigned.
+    :param costs: (rows, columns) cost matrix with rows <= columns
+    :param time_limit: Seconds to spend bidding
+    :param epsilon: The bid increment, the result is within rows * epsilon of optimal
+    :return: Array with the column assigned to every row, -1 for unassigned rows
+    """
+    start_time = time.perf_counter()
+    values = -np.asarray(costs, dtype=np.float64)
+    rows, columns = values.shape
+    if epsilon is None:
+        epsilon = (float(values.max() - values.min()) or 1.0) / (100 * rows)
+    prices = np.zeros(columns)
+    owner = np.full(columns, -1, dtype=np.int64)
+    assignment = np.full(rows, -1, dtype=np.int64)
+    unassigned = list(range(rows))
+    while unassigned:
+        if time.perf_counter() - start_time > time_limit:
+            break
+        row = unassigned.pop()
+        net = values[row] - prices
+        best = int(net.argmax())
+        second = np.partition(net, -2)[-2] if columns > 1 else net[best]
+        prices[best] += net[best] - second + epsilon
+        if owner[best] >= 0:
+            assignment[owner[best]] = -1
+            unassigned.append(owner[best])
+        owner[best] = row
+        assignment[row] = best
+    return assignment
+
+
+class TargetAssigner:
+    """
+    Assigns targets to a fleet of ships in one go.
+
+    The candidates are the richest free cells by effective yield. A ship's
+    cost for a cell is minus the halite it yields per turn spent getting
+    there and back to the closest dropoff afterwards, so every cell is
+    weighed against every ship at once instead of ship by ship. Up to
+    exact_limit ships the assignment is optimal; larger fleets use an
+    auction bounded by the time limit, and ships it leaves out get the
+    best cell still free.
+    """
+
+    def __init__(self, game_map, exact_limit=80, time_limit=0.1, candidates_per_ship=3):
+        """
+        :param game_map: The map to assign targets on
+        :param exact_limit: The most ships assigned with the exact method
+        :param time_limit: Seconds the auction may take for larger fleets
+        :param candidates_per_ship: How many candidate cells to consider per ship
+        """
+        self.game_map = game_map
+        self.exact_limit = exact_limit
+        self.time_limit = time_limit
+        self.candidates_per_ship = candidates_per_ship
+        self.last_stats = {}
+
+    def candidates(self, count, excluded=(), starts=()):
+        """
+        :param count: How many cells to return
+        :param excluded: Cell indices not to consider
+        :param starts: Cell indices of the ships being assigned, they may stay where they are
+        :return: The cell indices of the richest cells by effective yield without (other) ships on them
+        """
+        game_map = self.game_map
+        value = game_map.effective_yield.astype(np.float64)
+        occupied = game_map.ship_owner >= 0
+        occupied[list(starts)] = False
+        value[occupied] = -1
+        value[list(excluded)] = -1
+        count = min(count, int((value > 0).sum()))
+        if count <= 0:
+            return np.zeros(0, dtype=np.int64)
+        return np.argpartition(-value, count - 1)[:count]
+
+    def costs(self, ships, cells, dropoffs):
+        """
+        :return: The (ships, cells) cost matrix
+        """
+        game_map = self.game_map
+        width, height = game_map.width, game_map.height
+        starts = np.array([game_map.cell_index(ship.position) for ship in ships])
+        distance_x = np.abs(starts[:, None] % width - cells[None, :] % width)
+        distance_y = np.abs(starts[:, None] // width - cells[None, :] // width)
+        distance = np.minimum(distance_x, width - distance_x) + np.minimum(distance_y, height - distance_y)
+        trip = distance + game_map.return_field(dropoffs).distance[cells][None, :] + 1
+        return -game_map.effective_yield[cells][None, :] / trip
+
+    def assign(self, ships, dropoffs, excluded=()):
+        """
+        :param ships: The ships that need a target
+        :param dropoffs: The positions ships return to
+        :param excluded: Cell indices not to hand out, e.g. targets of other ships
+        :return: Dict of ship id to target position, ships without a free cell are left out
+        """
+        start_time = time.perf_counter()
+        ships = list(ships)
+        starts = [self.game_map.cell_index(ship.position) for ship in ships]
+        cells = self.candidates(len(ships) * self.candidates_per_ship, excluded, starts)
+        if not ships or not len(cells):
+            return {}
+        # With more ships than cells, the ones listed first get them
+        ships = ships[:len(cells)]
+        costs = self.costs(ships, cells, dropoffs)
+        if len(ships) <= self.exact_limit:
+            method = "exact"
+            assignment = min_cost_assignment(costs)
+        else:
+            method = "auction"
+            assignment = auction_assignment(costs, self.time_limit)
+        left_out = np.flatnonzero(assignment < 0)
+        if len(left_out):
+            taken = np.zeros(len(cells), dtype=bool)
+            taken[assignment[assignment >= 0]] = True
+            for row in left_out:
+                row_costs = np.where(taken, np.inf, costs[row])
+                assignment[row] = int(row_costs.argmin())
+                taken[assignment[row]] = True
+        self.last_stats = {
+            "ships": len(ships),
+            "cells": len(cells),
+            "method": method,
+            "left_out": len(left_out),
+            "time": time.perf_counter() - start_time,
+        }
+        logger.debug("Target assignment: {}", self.last_stats)
+        return {ship.id: self.game_map.positions[int(cells[column])]
+                for ship, column in zip(ships, assignment)}
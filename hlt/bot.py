@@ -0,0 +1,66 @@
+from .networking import Game
+
+
+class Bot:
+    """
+    A bot's decision logic, with all of its state on the instance.
+
+    The game drives it: on_start once the initial map is read, on_turn
+    every turn with the new frame loaded into the game, end_turn to send
+    the commands and on_end once the game is over. As nothing is kept in module globals, several bots
+    can play in one process, e.g. against each other in an in-process
+    engine.
+    """
+
+    name = "Bot"
+
+    def on_start(self, game):
+        """
+        Called once the game's initial state is read, before the bot says it is ready.
+        This is the place for expensive start-up pre-processing.
+        :param game: The Game
+        :return: nothing
+        """
+
+    def on_turn(self, game):
+        """
+        Called every turn once the frame is read.
+        :param game: The Game, with this turn's frame loaded
+        :return: The list of commands for this turn
+        """
+        return []
+
+    def end_turn(self, game, commands):
+        """
+        Sends the commands of the turn to the engine.
+        :param game: The Game
+        :param commands: The commands on_turn returned
+        :return: nothing
+        """
+        game.end_turn(commands)
+
+    def on_end(self, game):
+        """
+        Called once the game is over, or the bot is stopped, to close what the bot opened.
+        :param game: The Game
+        :return: nothing
+        """
+
+
+def run(bot, game=None):
+    """
+    Plays a whole game with a bot. Reading past the last frame ends the
+    process, see hlt.common.read_ints.
+    :param bot: The Bot
+    :param game: The Game to play, defaults to one over stdin and stdout
+    :return: nothing
+    """
+    game = game or Game()
+    try:
+        bot.on_start(game)
+        game.ready(bot.name)
+        while True:
+            game.update_frame()
+            bot.end_turn(game, bot.on_turn(game))
+    finally:
+        bot.on_end(game)
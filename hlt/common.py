@@ -1,11 +1,109 @@
+import logging
+import sys
+
+
+class InputReader:
+    """
+    Reads the engine's input from a binary stream in bulk.
+
+    Whatever the stream has available is read in one go and kept in a
+    buffer, which is then cut into lines or into runs of integers without
+    going back to the stream for every line. Everything read can be copied
+    to a tee, e.g. to record a game.
+    """
+
+    def __init__(self, stream):
+        """
+        :param stream: A buffered binary stream, e.g. sys.stdin.buffer
+        """
+        self._stream = stream
+        self._buffer = b""
+        # Called with every chunk read from the stream
+        self.tee = None
+
+    def _fill(self):
+        chunk = self._stream.read1(1 << 16)
+        if not chunk:
+            raise EOFError("End of input")
+        if self.tee is not None:
+            self.tee(chunk)
+        self._buffer += chunk
+
+    def line(self):
+        """
+        :return: The next line, without its line ending
+        """
+        end = self._buffer.find(b"\n")
+        while end < 0:
+            searched = len(self._buffer)
+            self._fill()
+            end = self._buffer.find(b"\n", searched)
+        line = self._buffer[:end]
+        self._buffer = self._buffer[end + 1:]
+        return line.rstrip(b"\r").decode()
+
+    def ints(self, count):
+        """
+        Reads the next whitespace separated integers, whatever lines they are on.
+        :param count: How many integers to read
+        :return: A list of the integers
+        """
+        if count <= 0:
+            return []
+        while True:
+            tokens = self._buffer.split(None, count)
+            # The last token is only complete when whitespace follows it
+            if len(tokens) > count:
+                self._buffer = tokens.pop()
+                break
+            if len(tokens) == count and self._buffer[-1:].isspace():
+                self._buffer = b""
+                break
+            self._fill()
+        return list(map(int, tokens))
+
+
+def command_line_option(option, argv=None):
+    """
+    :param option: The option, e.g. --log-level, given as "--option value" or "--option=value"
+    :param argv: The command line, defaults to sys.argv
+    :return: The value of the last occurrence of the option, None if it is not given
+    """
+    argv = sys.argv if argv is None else argv
+    value = None
+    for index, argument in enumerate(argv):
+        name, equals, given = argument.partition("=")
+        if name == option:
+            if equals:
+                value = given
+            elif index + 1 < len(argv):
+                value = argv[index + 1]
+    return value
+
+
 # Placed here to avoid circular imports
-def read_input():
+def read_input(reader):
     """
-    Reads input from stdin, shutting down logging and exiting if an EOFError occurs
+    Reads a line of engine input, shutting down logging and exiting if an EOFError occurs
+    :param reader: The InputReader to read from, e.g. the Game's
     :return: input read
     """
     try:
-        return input()
+        return reader.line()
+    except EOFError as eof:
+        logging.shutdown()
+        raise SystemExit(eof)
+
+
+def read_ints(count, reader):
+    """
+    Reads integers of engine input, shutting down logging and exiting if an EOFError occurs
+    :param count: How many integers to read
+    :param reader: The InputReader to read from, e.g. the Game's
+    :return: A list of the integers
+    """
+    try:
+        return reader.ints(count)
     except EOFError as eof:
         logging.shutdown()
         raise SystemExit(eof)
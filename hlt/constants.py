@@ -2,7 +2,10 @@
 The constants representing the game variation being played.
 They come from game engine and changing them has no effect.
 They are strictly informational.
+
+The lookup tables built from them are indexed by the halite amount of a cell.
 """
+import numpy as np
 
 
 def load_constants(constants):
@@ -58,3 +61,50 @@ def load_constants(constants):
 
     """An inspired ship instead spends 1/X% halite to move."""
     INSPIRED_MOVE_COST_RATIO = constants['INSPIRED_MOVE_COST_RATIO']
+
+    _build_tables(MAX_HALITE + 1)
+
+
+def _build_tables(size):
+    global MOVE_COST, INSPIRED_MOVE_COST, EXTRACTED, INSPIRED_EXTRACTED, TURNS_TO_FILL
+
+    halite = np.arange(size, dtype=np.int32)
+
+    """The halite it costs to move off a cell."""
+    MOVE_COST = halite // MOVE_COST_RATIO
+
+    """The halite it costs an inspired ship to move off a cell."""
+    INSPIRED_MOVE_COST = halite // INSPIRED_MOVE_COST_RATIO
+
+    """The halite a ship mines from a cell in one turn (rounded up, like the engine does)."""
+    EXTRACTED = -(-halite // EXTRACT_RATIO)
+
+    """The halite an inspired ship collects from a cell in one turn, bonus included."""
+    extracted = -(-halite // INSPIRED_EXTRACT_RATIO)
+    INSPIRED_EXTRACTED = extracted + (extracted * INSPIRED_BONUS_MULTIPLIER).astype(np.int32)
+
+    """
+    The turns an empty ship has to stay on a cell to fill up, or MAX_TURNS
+    if the cell runs dry first.
+    """
+    TURNS_TO_FILL = np.full(size, MAX_TURNS, dtype=np.int32)
+    cargo = np.zeros(size, dtype=np.int32)
+    remaining = halite.copy()
+    for turn in range(1, MAX_TURNS + 1):
+        mining = (cargo < MAX_HALITE) & (remaining > 0)
+        if not mining.any():
+            break
+        mined = np.minimum(-(-remaining // EXTRACT_RATIO), MAX_HALITE - cargo) * mining
+        cargo += mined
+        remaining -= mined
+        TURNS_TO_FILL[mining & (cargo >= MAX_HALITE)] = turn
+
+
+def fit_tables(max_halite):
+    """
+    Makes sure the lookup tables reach cells with max_halite halite, since
+    dropped cargo can push a cell over the amounts seen so far.
+    :param max_halite: The largest halite amount on a cell
+    """
+    if max_halite >= len(MOVE_COST):
+        _build_tables(max(max_halite + 1, 2 * len(MOVE_COST)))
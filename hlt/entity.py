@@ -1,7 +1,7 @@
 import abc
 
 from . import commands, constants
-from .positionals import Direction, Position
+from .positionals import Direction
 from .common import read_input
 
 
@@ -9,20 +9,24 @@ class Entity(abc.ABC):
     """
     Base Entity Class from whence Ships, Dropoffs and Shipyards inherit
     """
+    __slots__ = ("owner", "id", "position")
+
     def __init__(self, owner, id, position):
         self.owner = owner
         self.id = id
         self.position = position
 
     @staticmethod
-    def _generate(player_id):
+    def _generate(player_id, reader, positions):
         """
         Method which creates an entity for a specific player given input from the engine.
         :param player_id: The player id for the player who owns this entity
+        :param reader: The InputReader to read from
+        :param positions: The PositionGrid of the game's map
         :return: An instance of Entity along with its id
         """
-        ship_id, x_position, y_position = map(int, read_input().split())
-        return ship_id, Entity(player_id, ship_id, Position(x_position, y_position))
+        ship_id, x_position, y_position = map(int, read_input(reader).split())
+        return ship_id, Entity(player_id, ship_id, positions.at(x_position, y_position))
 
     def __repr__(self):
         return "{}(id={}, {})".format(self.__class__.__name__,
@@ -34,13 +38,15 @@ class Dropoff(Entity):
     """
     Dropoff class for housing dropoffs
     """
-    pass
+    __slots__ = ()
 
 
 class Shipyard(Entity):
     """
     Shipyard class to house shipyards
     """
+    __slots__ = ()
+
     def spawn(self):
         """Return a move to spawn a new ship."""
         return commands.GENERATE
@@ -50,6 +56,8 @@ class Ship(Entity):
     """
     Ship class to house ship entities
     """
+    __slots__ = ("halite_amount",)
+
     def __init__(self, owner, id, position, halite_amount):
         super().__init__(owner, id, position)
         self.halite_amount = halite_amount
@@ -89,14 +97,16 @@ class Ship(Entity):
         return "{} {} {}".format(commands.MOVE, self.id, commands.STAY_STILL)
 
     @staticmethod
-    def _generate(player_id):
+    def _generate(player_id, reader, positions):
         """
         Creates an instance of a ship for a given player given the engine's input.
         :param player_id: The id of the player who owns this ship
+        :param reader: The InputReader to read from
+        :param positions: The PositionGrid of the game's map
         :return: The ship id and ship object
         """
-        ship_id, x_position, y_position, halite = map(int, read_input().split())
-        return ship_id, Ship(player_id, ship_id, Position(x_position, y_position), halite)
+        ship_id, x_position, y_position, halite = map(int, read_input(reader).split())
+        return ship_id, Ship(player_id, ship_id, positions.at(x_position, y_position), halite)
 
     def __repr__(self):
         return "{}(id={}, {}, cargo={} halite ({}%))".format(self.__class__.__name__,
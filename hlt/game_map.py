@@ -1,47 +1,224 @@
-import queue
-
 from . import constants
 from .entity import Entity, Shipyard, Ship, Dropoff
 from .player import Player
-from .positionals import Direction, Position
-from .common import read_input
+from .positionals import Direction, Position, PositionGrid
+from .common import read_ints
+from .return_field import ReturnField
+from .pathfinding import PathCache, PathFinder
 import numpy as np
 import logging
 import random
-import heapq
+from bisect import bisect_left, insort
+from itertools import islice
+
+
+# Share of the map's halite that has to change hands before a ReturnField's
+# costs are rebuilt
+RETURN_FIELD_REFRESH_RATIO = 0.05
+
+# Radius up to which square_window and manhattan_window build whole-map tables
+MAX_NEIGHBORHOOD_TABLE_RADIUS = 8
+
 
+def _wrapped_prefix_sums(grid):
+    """
+    Summed-area table of a (height, width) grid tiled twice in both
+    directions, so any window that fits on the map sums without wrapping.
+    """
+    tiled = np.tile(grid, (2, 2))
+    sums = np.zeros((tiled.shape[0] + 1, tiled.shape[1] + 1), dtype=np.int64)
+    np.cumsum(tiled, axis=0, dtype=np.int64, out=sums[1:, 1:])
+    np.cumsum(sums[1:, 1:], axis=1, out=sums[1:, 1:])
+    return sums
 
-class PriorityQueue:
 
-    def __init__(self):
-        self.elements = []
+def _manhattan_sums(grid, radius):
+    """
+    For every cell of a (height, width) grid, the sum of the cells within a
+    wrapped Manhattan distance of radius, each cell counted once.
+    Row by row: a window sum along x from prefix sums, shifted along y.
+    """
+    height, width = grid.shape
+    tiled = np.tile(grid, (1, 3))
+    prefix = np.zeros((height, tiled.shape[1] + 1), dtype=np.int64)
+    np.cumsum(tiled, axis=1, dtype=np.int64, out=prefix[:, 1:])
+    sums = np.zeros((height, width), dtype=np.int64)
+    for dy in range(-min(radius, (height - 1) // 2), min(radius, height // 2) + 1):
+        reach = radius - abs(dy)
+        start = width - min(reach, (width - 1) // 2)
+        end = width + min(reach, width // 2) + 1
+        sums += np.roll(prefix[:, end:end + width] - prefix[:, start:start + width], -dy, axis=0)
+    return sums
+
+
+class HaliteIndex:
+    """
+    Cell indices bucketed by halite amount.
+
+    Kept up to date one cell at a time from the updates the engine sends, so
+    the richest cells can be read off the top without sorting the whole map.
+    Within a bucket cells come out in cell index order.
+    """
+    __slots__ = ("_amounts", "_buckets", "_values")
+
+    def __init__(self, halite):
+        self._amounts = [int(amount) for amount in halite]
+        self._buckets = {}
+        for index, amount in enumerate(self._amounts):
+            self._buckets.setdefault(amount, set()).add(index)
+        self._values = sorted(self._buckets)
+
+    def update(self, index, amount):
+        """
+        Move a cell to the bucket for its new halite amount.
+        :param index: The cell index
+        :param amount: The new halite amount of that cell
+        """
+        old_amount = self._amounts[index]
+        if old_amount == amount:
+            return
+        bucket = self._buckets[old_amount]
+        bucket.discard(index)
+        if not bucket:
+            del self._buckets[old_amount]
+            del self._values[bisect_left(self._values, old_amount)]
+        self._amounts[index] = amount
+        bucket = self._buckets.get(amount)
+        if bucket is None:
+            self._buckets[amount] = {index}
+            insort(self._values, amount)
+        else:
+            bucket.add(index)
+
+    def descending(self, minimum=None):
+        """
+        :param minimum: Stop at cells with less halite than this
+        :return: A generator of cell indices, richest first
+        """
+        stop = 0 if minimum is None else bisect_left(self._values, minimum)
+        for position in range(len(self._values) - 1, stop - 1, -1):
+            yield from sorted(self._buckets[self._values[position]])
 
-    def empty(self):
-        return len(self.elements) == 0
+    def top(self, count):
+        """
+        :return: The indices of the count richest cells
+        """
+        return list(islice(self.descending(), count))
 
-    def put(self, item, priority):
-        heapq.heappush(self.elements, (priority, item))
+    def at_least(self, amount):
+        """
+        :return: The indices of all cells holding at least amount halite
+        """
+        return list(self.descending(amount))
 
-    def get(self):
-        return heapq.heappop(self.elements)[1]
+    def best(self, indices):
+        """
+        :param indices: A set of cell indices
+        :return: The index of the richest cell in that set, None if it is empty
+        """
+        # Walk down from the top while that is cheaper than checking every
+        # cell of the region
+        for visited, index in enumerate(self.descending()):
+            if index in indices:
+                return index
+            if visited >= len(indices):
+                break
+        return max(indices, key=lambda index: (self._amounts[index], -index), default=None)
 
 
 class MapCell:
-    """A cell on the game map."""
+    """
+    A cell on the game map.
+
+    MapCell holds no state of its own, it is a view over the cell arrays of
+    its GameMap, so reads and writes go straight to those arrays.
+    """
+    __slots__ = ("_map", "index", "position")
 
-    def __init__(self, position, halite_amount):
+    def __init__(self, game_map, index, position):
+        self._map = game_map
+        self.index = index
         self.position = position
-        self.halite_amount = halite_amount
-        self.ship = None
-        self.structure = None
-        self._cost = halite_amount / constants.MOVE_COST_RATIO
+
+    @property
+    def halite_amount(self):
+        return int(self._map.halite[self.index])
+
+    @halite_amount.setter
+    def halite_amount(self, halite_amount):
+        self._map.halite[self.index] = halite_amount
+        self._map.halite_index.update(self.index, halite_amount)
+        self.update_cost()
+        self._map.costs_version += 1
 
     def update_cost(self):
-        self._cost = self.halite_amount / constants.MOVE_COST_RATIO
+        game_map = self._map
+        index = self.index
+        halite_amount = game_map.halite[index]
+        constants.fit_tables(halite_amount)
+        game_map.move_cost[index] = constants.MOVE_COST[halite_amount]
+        game_map.mining_yield[index] = constants.EXTRACTED[halite_amount]
+        # Which cells inspire is only recounted once per frame, the values follow the halite right away
+        if game_map.inspired[index]:
+            game_map.effective_yield[index] = constants.INSPIRED_EXTRACTED[halite_amount]
+            game_map.effective_move_cost[index] = constants.INSPIRED_MOVE_COST[halite_amount]
+        else:
+            game_map.effective_yield[index] = game_map.mining_yield[index]
+            game_map.effective_move_cost[index] = game_map.move_cost[index]
 
     @property
     def cost(self):
-        return self._cost
+        return int(self._map.move_cost[self.index])
+
+    @property
+    def mining_yield(self):
+        """
+        :return: The halite a ship mines from this cell in one turn
+        """
+        return int(self._map.mining_yield[self.index])
+
+    @property
+    def inspired(self):
+        """
+        :return: Whether a ship on this cell is inspired
+        """
+        return bool(self._map.inspired[self.index])
+
+    @property
+    def effective_yield(self):
+        """
+        :return: The halite a ship collects from this cell in one turn, inspiration included
+        """
+        return int(self._map.effective_yield[self.index])
+
+    @property
+    def turns_to_fill(self):
+        """
+        :return: The turns an empty ship has to stay here to fill up, or MAX_TURNS if it can't
+        """
+        return int(constants.TURNS_TO_FILL[self._map.halite[self.index]])
+
+    @property
+    def ship(self):
+        return self._map._ships[self.index]
+
+    @ship.setter
+    def ship(self, ship):
+        self._map._ships[self.index] = ship
+        if ship is None:
+            self._map.ship_owner[self.index] = -1
+        else:
+            self._map.ship_owner[self.index] = ship.owner
+            self._map._marked.append(self.index)
+
+    @property
+    def structure(self):
+        return self._map._structures[self.index]
+
+    @structure.setter
+    def structure(self, structure):
+        self._map._structures[self.index] = structure
+        self._map.structure_owner[self.index] = -1 if structure is None else structure.owner
 
     @property
     def is_empty(self):
@@ -57,6 +234,21 @@ class MapCell:
         """
         return self.ship is not None
 
+    @property
+    def has_own_ship(self):
+        """
+        :return: Whether this cell has one of our ships
+        """
+        return self._map.ship_owner[self.index] == self._map.my_id
+
+    @property
+    def has_enemy_ship(self):
+        """
+        :return: Whether this cell has a ship of another player
+        """
+        owner = self._map.ship_owner[self.index]
+        return owner >= 0 and owner != self._map.my_id
+
     @property
     def has_structure(self):
         """
@@ -95,35 +287,276 @@ class GameMap:
 
     Can be indexed by a position, or by a contained entity.
     Coordinates start at 0. Coordinates are normalized for you
+
+    Cell state is kept in flat int arrays indexed by cell index (y * width + x):
+    halite, move_cost, mining_yield, ship_owner and structure_owner (-1 for
+    none). Costs and yields are looked up in the constants tables. The
+    MapCell objects returned by indexing are views over those arrays.
+    Cells a ship was put on are remembered, so clearing the ships for the
+    next frame only touches those cells. my_id tells own ships from enemy
+    ones.
+    positions holds the interned Position of every cell, and neighbor_indices
+    (neighbor_lists as plain tuples) the wrapped North, South, East, West and
+    Still cell indices of every cell.
+    halite_index keeps the cells ordered by halite for the richest cell queries.
+    Summed-area tables of halite and of own ship occupancy, refreshed every
+    frame, make any window sum O(1).
+    Every frame inspiration counts the enemy ships within the inspiration
+    radius of each cell, and effective_yield and effective_move_cost are
+    the yield and move cost a ship on the cell gets, inspired or not.
     """
 
-    def __init__(self, cells, width, height):
+    def __init__(self, halite, width, height):
         self.width = width
         self.height = height
-        self._cells = cells
+        self.halite = np.asarray(halite, dtype=np.int32).reshape(width * height)
+        constants.fit_tables(int(self.halite.max()))
+        self.move_cost = constants.MOVE_COST[self.halite]
+        self.mining_yield = constants.EXTRACTED[self.halite]
+        self.inspiration = np.zeros(width * height, dtype=np.int64)
+        self.inspired = np.zeros(width * height, dtype=bool)
+        self.effective_yield = self.mining_yield.copy()
+        self.effective_move_cost = self.move_cost.copy()
+        self.ship_owner = np.full(width * height, -1, dtype=np.int32)
+        self.structure_owner = np.full(width * height, -1, dtype=np.int32)
+        self._ships = [None] * (width * height)
+        self._structures = [None] * (width * height)
+        # Cell indices a ship was put on since the last clear
+        self._marked = []
+        self.my_id = None
+        self.positions = PositionGrid(width, height)
+        self.neighbor_lists = self.positions.neighbor_indices
+        self.neighbor_indices = np.array(self.neighbor_lists, dtype=np.int32)
+        self._neighborhoods = {}
+        self._halite_sums = None
+        self._own_ship_sums = None
+        self._return_field = None
+        self._halite_moved = 0
+        self._pathfinder = None
+        self._path_cache = None
+        # Bumped whenever move costs change
+        self.costs_version = 0
+        self._cells = [MapCell(self, position.index, position) for position in self.positions]
+        self.halite_index = HaliteIndex(self.halite)
         self._average = None
         self._total = None
 
+    def cell_index(self, position):
+        """
+        :param position: A position, normalized or not
+        :return: The index of the cell at that position in the cell arrays
+        """
+        return (position.y % self.height) * self.width + position.x % self.width
+
+    def position_at(self, index):
+        """
+        :param index: A cell index
+        :return: The position of the cell with that index
+        """
+        return self.positions[index]
+
+    def cell_at(self, index):
+        """
+        :param index: A cell index
+        :return: The cell with that index
+        """
+        return self._cells[index]
+
+    def square_neighborhood(self, radius, stop=None):
+        """
+        Table of the cells around every cell in a square window, wrapped
+        around the map. Offsets run from -radius up to (excluding) stop, which
+        defaults to radius + 1; x is the outer loop.
+        :return: A (cells, window size) array of cell indices, row i belonging to cell i
+        """
+        return self._neighborhood(("square", radius, stop))
+
+    def manhattan_neighborhood(self, radius):
+        """
+        Table of the cells within Manhattan distance radius of every cell,
+        wrapped around the map.
+        :return: A (cells, neighborhood size) array of cell indices, row i belonging to cell i
+        """
+        return self._neighborhood(("manhattan", radius))
+
+    def square_window(self, position, radius, stop=None):
+        """
+        :return: The cell indices of the square window around one position, see square_neighborhood
+        """
+        return self._window(self.cell_index(position), ("square", radius, stop))
+
+    def manhattan_window(self, position, radius):
+        """
+        :return: The cell indices within Manhattan distance radius of one position
+        """
+        return self._window(self.cell_index(position), ("manhattan", radius))
+
+    @staticmethod
+    def _offsets(key):
+        if key[0] == "square":
+            _, radius, stop = key
+            stop = radius + 1 if stop is None else stop
+            return [(dx, dy) for dx in range(-radius, stop) for dy in range(-radius, stop)]
+        radius = key[1]
+        return [(dx, dy) for dx in range(-radius, radius + 1)
+                for dy in range(-radius + abs(dx), radius - abs(dx) + 1)]
+
+    def _indices_around(self, indices, key):
+        dx, dy = np.array(self._offsets(key), dtype=np.int32).reshape(-1, 2).T
+        x = (indices % self.width)[:, None]
+        y = (indices // self.width)[:, None]
+        return (((y + dy) % self.height) * self.width + (x + dx) % self.width).astype(np.int32)
+
+    def _neighborhood(self, key):
+        table = self._neighborhoods.get(key)
+        if table is None:
+            table = self._neighborhoods[key] = self._indices_around(
+                np.arange(self.width * self.height), key)
+        return table
+
+    def _window(self, index, key):
+        # Whole-map tables for big windows cost too much memory, those get
+        # computed for the one cell asked for
+        if key in self._neighborhoods or key[1] <= MAX_NEIGHBORHOOD_TABLE_RADIUS:
+            return self._neighborhood(key)[index]
+        return self._indices_around(np.array([index]), key)[0]
+
     def __getitem__(self, location):
         """
         Getter for position object or entity objects within the game map
         :param location: the position or entity to access in this map
         :return: the contents housing that cell or entity
         """
-        if isinstance(location, Position):
-            location = self.normalize(location)
-            return self._cells[location.y][location.x]
-        elif isinstance(location, Entity):
-            return self._cells[location.position.y][location.position.x]
-        return None
+        if isinstance(location, Entity):
+            location = location.position
+        elif not isinstance(location, Position):
+            return None
+        if location._grid is self.positions:
+            return self._cells[location.index]
+        return self._cells[self.cell_index(location)]
+
+    @property
+    def halite_grid(self):
+        """
+        :return: A (height, width) view of the halite array
+        """
+        return self.halite.reshape(self.height, self.width)
+
+    def halite_in_window(self, position, radius, stop=None):
+        """
+        Halite in the square window around a position. Offsets run from
+        -radius up to (excluding) stop, which defaults to radius + 1, and the
+        window must fit on the map.
+        :return: The halite summed over that window
+        """
+        return int(self._window_sums(self._halite_sums, self.cell_index(position), radius, stop))
+
+    def own_ships_in_window(self, position, radius, stop=None):
+        """
+        :return: The number of own ships in the square window around a position, see halite_in_window
+        """
+        return int(self._window_sums(self._own_ship_sums, self.cell_index(position), radius, stop))
+
+    def halite_window_sums(self, radius, stop=None):
+        """
+        :return: An array holding, for every cell, the halite in the square window around it
+        """
+        return self._window_sums(self._halite_sums, np.arange(self.width * self.height), radius, stop)
+
+    def own_ship_window_sums(self, radius, stop=None):
+        """
+        :return: An array holding, for every cell, the number of own ships in the square window around it
+        """
+        return self._window_sums(self._own_ship_sums, np.arange(self.width * self.height), radius, stop)
+
+    def _window_sums(self, sums, indices, radius, stop):
+        stop = radius + 1 if stop is None else stop
+        size = radius + stop
+        left = (indices % self.width - radius) % self.width
+        top = (indices // self.width - radius) % self.height
+        return sums[top + size, left + size] - sums[top, left + size] \
+            - sums[top + size, left] + sums[top, left]
+
+    def own_ship_cells(self):
+        """
+        :return: The cell indices holding one of our ships
+        """
+        return np.flatnonzero(self.ship_owner == self.my_id)
+
+    def enemy_ship_cells(self):
+        """
+        :return: The cell indices holding a ship of another player
+        """
+        return np.flatnonzero((self.ship_owner >= 0) & (self.ship_owner != self.my_id))
+
+    def remove_own_ships(self):
+        """
+        Marks the cells holding our ships as safe again, leaving enemy ships in place.
+        :return: nothing
+        """
+        for index in self.own_ship_cells().tolist():
+            self._ships[index] = None
+        self.ship_owner[self.ship_owner == self.my_id] = -1
+
+    def _clear_ships(self):
+        ships = self._ships
+        ship_owner = self.ship_owner
+        for index in self._marked:
+            ships[index] = None
+            ship_owner[index] = -1
+        self._marked = []
+
+    def _refresh_window_sums(self):
+        """
+        Rebuilds the summed-area tables from the current halite and ship owner arrays.
+        """
+        self._halite_sums = _wrapped_prefix_sums(self.halite_grid)
+        own_ships = (self.ship_owner == self.my_id).reshape(self.height, self.width)
+        self._own_ship_sums = _wrapped_prefix_sums(own_ships)
+
+    def _refresh_inspiration(self):
+        """
+        Recounts the enemy ships around every cell from the ship owner array,
+        then which cells inspire and the yields and move costs that follow.
+        """
+        if not constants.INSPIRATION_ENABLED:
+            # Nothing inspires, the plain arrays are updated in place so these follow them
+            self.inspiration.fill(0)
+            self.inspired.fill(False)
+            self.effective_yield = self.mining_yield
+            self.effective_move_cost = self.move_cost
+            return
+        enemies = ((self.ship_owner >= 0) & (self.ship_owner != self.my_id)).reshape(self.height, self.width)
+        self.inspiration = _manhattan_sums(enemies, constants.INSPIRATION_RADIUS).reshape(-1)
+        self.inspired = self.inspiration >= constants.INSPIRATION_SHIP_COUNT
+        self.effective_yield = np.where(
+            self.inspired, constants.INSPIRED_EXTRACTED[self.halite], self.mining_yield)
+        self.effective_move_cost = np.where(
+            self.inspired, constants.INSPIRED_MOVE_COST[self.halite], self.move_cost)
+
+    def return_field(self, dropoffs):
+        """
+        The way back to the closest dropoff from every cell, see ReturnField.
+        It is kept between turns and rebuilt only when the dropoffs change or
+        enough halite was mined or dropped since it was built.
+        :param dropoffs: The positions ships return to (shipyard and dropoffs)
+        :return: The ReturnField for those positions
+        """
+        field = self._return_field
+        if field is not None and len(field.key) == len(dropoffs) and \
+                all(self.cell_index(position) == index for position, index in zip(dropoffs, field.key)):
+            if self._halite_moved <= self.total_halite * RETURN_FIELD_REFRESH_RATIO:
+                return field
+            field.update_costs()
+        else:
+            field = self._return_field = ReturnField(self, dropoffs)
+        self._halite_moved = 0
+        return field
 
     @property
     def total_halite(self):
-        if not self._total:
-            cells = np.array(self._cells).flatten()
-            tot = 0
-            tot += sum(c.halite_amount for c in cells)
-            self._total = tot
+        if self._total is None:
+            self._total = int(self.halite.sum(dtype=np.int64))
         return self._total
 
     @property
@@ -132,10 +565,31 @@ class GameMap:
             self._average = self.total_halite / (self.width * self.height)
         return self._average
 
-    def most_valueable_cells(self):
-        all_cells = np.array(self._cells).flatten()
-        return sorted(all_cells, key=lambda c: c.halite_amount, reverse=True)[:10]
+    def most_valueable_cells(self, count=10, unoccupied=False):
+        """
+        :param count: How many cells to return
+        :param unoccupied: Skip cells with a ship on them
+        :return: The count richest cells, richest first
+        """
+        cells = (self._cells[index] for index in self.halite_index.descending())
+        if unoccupied:
+            cells = (cell for cell in cells if self.ship_owner[cell.index] < 0)
+        return list(islice(cells, count))
 
+    def cells_with_halite(self, minimum):
+        """
+        :param minimum: The least amount of halite a cell should hold
+        :return: All cells holding at least that much halite, richest first
+        """
+        return [self._cells[index] for index in self.halite_index.at_least(minimum)]
+
+    def best_cell_in(self, positions):
+        """
+        :param positions: The positions making up a region of the map
+        :return: The richest cell in that region, None if it is empty
+        """
+        index = self.halite_index.best({self.cell_index(position) for position in positions})
+        return None if index is None else self._cells[index]
 
     def calculate_distance(self, source, target):
         """
@@ -147,9 +601,20 @@ class GameMap:
         """
         source = self.normalize(source)
         target = self.normalize(target)
-        resulting_position = abs(source - target)
-        return min(resulting_position.x, self.width - resulting_position.x) + \
-            min(resulting_position.y, self.height - resulting_position.y)
+        distance_x = abs(source.x - target.x)
+        distance_y = abs(source.y - target.y)
+        return min(distance_x, self.width - distance_x) + \
+            min(distance_y, self.height - distance_y)
+
+    def index_distance(self, source, target):
+        """
+        Compute the Manhattan distance between two cell indices.
+        Accounts for wrap-around.
+        """
+        distance_x = abs(source % self.width - target % self.width)
+        distance_y = abs(source // self.width - target // self.width)
+        return min(distance_x, self.width - distance_x) + \
+            min(distance_y, self.height - distance_y)
 
     def normalize(self, position):
         """
@@ -158,9 +623,11 @@ class GameMap:
         height bounds, and places it within those bounds considering
         wraparound.
         :param position: A position object.
-        :return: A normalized position object fitting within the bounds of the map
+        :return: The interned, normalized position fitting within the bounds of the map
         """
-        return Position(position.x % self.width, position.y % self.height)
+        if position._grid is self.positions:
+            return position
+        return self.positions.at(position.x, position.y)
 
     @staticmethod
     def _get_target_direction(source, target):
@@ -215,8 +682,7 @@ class GameMap:
                 continue
             target_pos = ship.position.directional_offset(direction)
             if not self[target_pos].is_occupied:
-                cost = self[target_pos].halite_amount / \
-                    constants.MOVE_COST_RATIO
+                cost = self[target_pos].cost
                 if lowest_cost is None or cost < lowest_cost:
                     lowest_cost = cost
                     best_direction = direction
@@ -240,8 +706,7 @@ class GameMap:
             if excluded_direction and excluded_direction == direction:
                 continue
             if not self[target_pos].is_occupied:
-                cost = self[target_pos].halite_amount / \
-                    constants.MOVE_COST_RATIO
+                cost = self[target_pos].cost
                 if lowest_cost is None or cost < lowest_cost:
                     lowest_cost = cost
                     best_direction = direction
@@ -265,103 +730,92 @@ class GameMap:
         # logging.info("We can't move, ordering to stay still... {}".format(ship))
         return Direction.Still
 
-    def heuristic(self, a, b):
-        return self.calculate_distance(a, b)
-        # (x1, y1) = a.x, a.y
-        # (x2, y2) = b.x, b.y
+    @property
+    def pathfinder(self):
+        """
+        :return: The PathFinder searching this map
+        """
+        if self._pathfinder is None:
+            self._pathfinder = PathFinder(self)
+        return self._pathfinder
 
-        # return abs(x1 - x2) + abs(y1 - y2)
+    @property
+    def path_cache(self):
+        """
+        :return: The PathCache keeping our ships' paths across turns
+        """
+        if self._path_cache is None:
+            self._path_cache = PathCache(self)
+        return self._path_cache
 
-    def a_star_navigate(self, ship, goal, blocked_position=None):
-        start = ship.position
-        if blocked_position:
-            exclude_dir = ship.position.directional(blocked_position)
+    def find_path(self, ship, goal, blocked_position=None):
+        """
+        Cheapest path for a ship to a goal, going around cells taken by other ships.
+        The ship's path is kept and repaired on later turns, see PathCache.
+        :param ship: The ship to move
+        :param goal: The position to reach
+        :param blocked_position: Optional position not to go through, searched from scratch as it is a one-off
+        :return: The positions from the ship's position to goal, both included, or None if there is no path
+        """
+        if blocked_position is None:
+            path = self.path_cache.find_path(ship, self.cell_index(goal), self._ships)
         else:
-            exclude_dir = None
+            path = self.pathfinder.find_path(
+                self.cell_index(ship.position), self.cell_index(goal), self._ships, ship,
+                self.cell_index(blocked_position))
+        return None if path is None else [self.positions[index] for index in path]
+
+    def a_star_navigate(self, ship, goal, blocked_position=None):
+        """
+        Returns a singular safe move along the cheapest path towards the destination.
 
-        if self.calculate_distance(start, goal) > 5:
-            # Too far away to calc with this
+        :param ship: The ship to move.
+        :param goal: Ending position
+        :param blocked_position: Optional position not to go through
+        :return: A direction.
+        """
+        path = self.find_path(ship, goal, blocked_position)
+        if path is None:
+            # Could not find a path, fallback to naive_navigate
+            exclude_dir = ship.position.directional(blocked_position) if blocked_position else None
             return self.naive_navigate(ship, goal, exclude_dir)
-        logging.debug("Distance astar: {}".format(self.calculate_distance(start, goal)))
-        frontier = PriorityQueue()
-        frontier.put(start, 0)
-        came_from = {}
-        cost_so_far = {}
-        came_from[start] = None
-        cost_so_far[start] = 0
-
-        while not frontier.empty():
-            current = frontier.get()
-
-            if current == goal:
-                # path = []
-                pos = None
-                while current != start:
-                    # path.append(current)
-                    pos = current
-                    current = came_from[current]
-                # path.append(start)
-                # path.reverse()
-                if pos:
-                    self[pos].mark_unsafe(ship)
-                    return ship.position.directional(pos)
-                else:
-                    return Direction.Still
-
-            for next in self[current].position.neighbors():
-                if blocked_position and next == blocked_position:
-                    continue
-                # if game_map[next].is_occupied:
-                # if next in intended_moves:
-                #     continue
-                if self[next].ship is not None:
-                    if ship != self[next].ship:
-                        continue
-
-                new_cost = cost_so_far[current] + self[next].cost
-                if next not in cost_so_far or new_cost < cost_so_far[next]:
-                    cost_so_far[next] = new_cost
-                    priority = new_cost + self.heuristic(goal, next)
-                    frontier.put(next, priority)
-                    came_from[next] = current
-
-        # Could not find a path, fallback to naive_navigate
-        # logging.warning("AStar navigate failed, falling back to naive_navigate")
-        return self.naive_navigate(ship, goal, exclude_dir)
+        if len(path) == 1:
+            return Direction.Still
+        self[path[1]].mark_unsafe(ship)
+        return ship.position.directional(path[1])
 
     @staticmethod
-    def _generate():
+    def _generate(reader):
         """
         Creates a map object from the input given by the game engine
+        :param reader: The InputReader to read from
         :return: The map object
         """
-        map_width, map_height = map(int, read_input().split())
-        game_map = [[None for _ in range(map_width)]
-                    for _ in range(map_height)]
-        for y_position in range(map_height):
-            cells = read_input().split()
-            for x_position in range(map_width):
-                game_map[y_position][x_position] = MapCell(Position(x_position, y_position),
-                                                           int(cells[x_position]))
-        return GameMap(game_map, map_width, map_height)
+        map_width, map_height = read_ints(2, reader)
+        halite = np.array(read_ints(map_width * map_height, reader), dtype=np.int32)
+        return GameMap(halite, map_width, map_height)
 
-    def _update(self):
+    def _update(self, updates):
         """
         Updates this map object from the input given by the game engine
+        :param updates: The changed cells this turn, as a flat list of x, y, halite
         :return: nothing
         """
         self._average = None
+        self._total = None
+        if self._path_cache is not None:
+            self._path_cache.new_turn()
         # Mark cells as safe for navigation (will re-mark unsafe cells
         # later)
-        for y in range(self.height):
-            for x in range(self.width):
-                self[Position(x, y)].ship = None
-        diff = 0
-        for _ in range(int(read_input())):
-            cell_x, cell_y, cell_energy = map(int, read_input().split())
-            cell = self[Position(cell_x, cell_y)]
-            diff += cell.halite_amount - cell_energy
-            cell.halite_amount = cell_energy
-            cell.update_cost()
-        if diff > 0:
-            self._total -= diff
+        self._clear_ships()
+        if updates:
+            updated = [cell_y * self.width + cell_x for cell_x, cell_y in zip(updates[0::3], updates[1::3])]
+            amounts = updates[2::3]
+            for index, cell_energy in zip(updated, amounts):
+                self.halite_index.update(index, cell_energy)
+            self._halite_moved += int(np.abs(self.halite[updated] - amounts).sum())
+            self.halite[updated] = amounts
+            constants.fit_tables(max(amounts))
+            self.move_cost[updated] = constants.MOVE_COST[amounts]
+            self.mining_yield[updated] = constants.EXTRACTED[amounts]
+            self.costs_version += 1
@@ -0,0 +1,211 @@
+import collections
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+
+from .common import command_line_option
+
+# Environment variables and command line options that configure the bot's logging
+LEVEL_VARIABLE = "HALITE_LOG_LEVEL"
+MODE_VARIABLE = "HALITE_LOG_MODE"
+LEVEL_OPTION = "--log-level"
+MODE_OPTION = "--log-mode"
+
+# Streams every record to the log file from a background thread
+FILE_MODE = "file"
+# Keeps the last records in memory and writes them out on an error or at the end of the game
+RING_MODE = "ring"
+# No log file at all
+OFF_MODE = "off"
+MODES = (FILE_MODE, RING_MODE, OFF_MODE)
+
+DEFAULT_LEVEL = "WARNING"
+DEFAULT_MODE = RING_MODE
+RING_CAPACITY = 2000
+FORMAT = "%(levelname)s:%(name)s:%(message)s"
+
+
+class BraceMessage:
+    """
+    A log message with its arguments, formatted with str.format only when a
+    handler turns it into text. Messages without braces are %-formatted as
+    usual.
+    """
+    __slots__ = ("fmt", "args")
+
+    def __init__(self, fmt, args):
+        """
+        :param fmt: The message, e.g. "Ship {} at {}"
+        :param args: The arguments for it
+        """
+        self.fmt = fmt
+        self.args = args
+
+    def __str__(self):
+        fmt = str(self.fmt)
+        if not self.args:
+            return fmt
+        if "{" in fmt:
+            return fmt.format(*self.args)
+        return fmt % self.args
+
+
+class BraceAdapter(logging.LoggerAdapter):
+    """
+    A logger whose calls read logger.info("Ship {} at {}", ship.id, position).
+    Records below the level are dropped before anything is built, the rest
+    carry a BraceMessage, so logging works as usual for every other logger
+    in the process.
+    """
+
+    def __init__(self, logger):
+        """
+        :param logger: The logging.Logger to log to
+        """
+        super().__init__(logger, {})
+
+    def log(self, level, msg, *args, **kwargs):
+        if self.isEnabledFor(level):
+            self.logger.log(level, BraceMessage(msg, args), **kwargs)
+
+
+def get_logger(name):
+    """
+    :param name: The logger's name, e.g. the module's __name__
+    :return: A BraceAdapter over that logger
+    """
+    return BraceAdapter(logging.getLogger(name))
+
+
+class RingBufferHandler(logging.handlers.MemoryHandler):
+    """
+    Keeps the last capacity records in memory and only writes them to the
+    target when a record of flush_level or higher comes in, or when the
+    handler is closed at the end of the game.
+    """
+
+    def __init__(self, capacity, flush_level=logging.ERROR, target=None):
+        """
+        :param capacity: How many records to keep, older ones are dropped
+        :param flush_level: The level from which a record writes out the buffer
+        :param target: The handler to write the records to
+        """
+        super().__init__(capacity, flush_level, target, flushOnClose=True)
+        self.buffer = collections.deque(maxlen=capacity)
+
+    def emit(self, record):
+        # Build the message now, the objects it refers to change during the game
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.exc_info = None
+        super().emit(record)
+
+    def shouldFlush(self, record):
+        return record.levelno >= self.flushLevel
+
+    def flush(self):
+        self.acquire()
+        try:
+            if self.target:
+                for record in self.buffer:
+                    self.target.handle(record)
+                self.target.flush()
+                self.buffer.clear()
+        finally:
+            self.release()
+
+
+class ThreadedQueueHandler(logging.handlers.QueueHandler):
+    """
+    Puts records on a queue that a background thread writes to the target
+    handlers, so the bot never waits on the disk. Closing the handler
+    writes out what is still queued.
+    """
+
+    def __init__(self, *handlers):
+        """
+        :param handlers: The handlers the background thread writes to
+        """
+        super().__init__(queue.Queue())
+        self.listener = logging.handlers.QueueListener(self.queue, *handlers, respect_handler_level=True)
+        self.listener.start()
+
+    def close(self):
+        self.acquire()
+        try:
+            if self.listener is not None:
+                self.listener.stop()
+                self.listener = None
+        finally:
+            self.release()
+        super().close()
+
+
+def log_settings(argv=None, environ=None):
+    """
+    Reads the log level and mode, the command line wins over the environment.
+    :param argv: The command line, defaults to sys.argv
+    :param environ: The environment, defaults to os.environ
+    :return: Tuple of the level (int) and the mode
+    """
+    environ = os.environ if environ is None else environ
+    level_name = command_line_option(LEVEL_OPTION, argv) or environ.get(LEVEL_VARIABLE, DEFAULT_LEVEL)
+    mode = command_line_option(MODE_OPTION, argv) or environ.get(MODE_VARIABLE, DEFAULT_MODE)
+    level = level_name.upper()
+    level = int(level) if level.isdigit() else logging.getLevelName(level)
+    if not isinstance(level, int):
+        raise ValueError("Unknown log level: {}".format(level_name))
+    mode = mode.lower()
+    if mode not in MODES:
+        raise ValueError("Unknown log mode: {}, expected one of {}".format(mode, ", ".join(MODES)))
+    return level, mode
+
+
+def setup_logging(filename, level=None, mode=None):
+    """
+    Sets up the root logger for a bot. Records below the level are dropped
+    before their message is built; the rest go to the file in the given mode.
+    Like logging.basicConfig, it does nothing when logging is already set up.
+    :param filename: The log file, it is overwritten
+    :param level: The log level, defaults to the environment or command line setting
+    :param mode: One of MODES, defaults to the environment or command line setting
+    :return: nothing
+    """
+    default_level, default_mode = log_settings()
+    level = default_level if level is None else level
+    mode = default_mode if mode is None else mode
+
+    root = logging.getLogger()
+    if root.handlers:
+        return
+    root.setLevel(level)
+    if mode == OFF_MODE:
+        root.addHandler(logging.NullHandler())
+        return
+
+    file_handler = logging.FileHandler(filename, mode="w")
+    file_handler.setFormatter(logging.Formatter(FORMAT))
+    if mode == FILE_MODE:
+        root.addHandler(ThreadedQueueHandler(file_handler))
+    else:
+        root.addHandler(RingBufferHandler(RING_CAPACITY, target=file_handler))
+    _log_uncaught_exceptions()
+
+
+def _log_uncaught_exceptions():
+    """
+    Logs a crash before the interpreter exits, so the ring buffer writes out what led up to it.
+    """
+    previous_hook = sys.excepthook
+
+    def hook(exc_type, exc_value, traceback):
+        if not issubclass(exc_type, KeyboardInterrupt):
+            logging.critical("Uncaught exception", exc_info=(exc_type, exc_value, traceback))
+        previous_hook(exc_type, exc_value, traceback)
+
+    sys.excepthook = hook
+
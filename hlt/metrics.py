@@ -0,0 +1,140 @@
+import json
+import os
+import time
+from contextlib import contextmanager
+
+from .common import command_line_option
+
+# Environment variable and command line option with the file to write the metrics to,
+# "{}" in it is replaced by the player id
+METRICS_VARIABLE = "HALITE_METRICS"
+METRICS_OPTION = "--metrics"
+
+
+def metrics_path(argv=None, environ=None):
+    """
+    :param argv: The command line, defaults to sys.argv
+    :param environ: The environment, defaults to os.environ
+    :return: The file to write the metrics to, None to not write any
+    """
+    environ = os.environ if environ is None else environ
+    return command_line_option(METRICS_OPTION, argv) or environ.get(METRICS_VARIABLE) or None
+
+
+class TurnMetrics:
+    """
+    Per-phase timings of a bot's turns, written as one JSON line per turn.
+
+    Every phase of a turn records its wall and CPU time, how often it ran
+    and how many ships it handled; phases that run more than once in a turn
+    add up. A line looks like:
+    {"turn": 12, "wall": 0.031, "cpu": 0.030,
+     "phases": {"update_frame": {"wall": 0.002, "cpu": 0.002, "calls": 1, "ships": 0}, ...}}
+
+    Without a file the phases are still timed for the turn, e.g. for the
+    scheduler's stages, but nothing is written.
+    """
+
+    def __init__(self, path=None):
+        """
+        :param path: The file to write the lines to, it is overwritten. None to write nothing
+        """
+        self.path = path
+        self._file = open(path, "w") if path else None
+        self._phases = {}
+        self._wall = time.perf_counter()
+        self._cpu = time.process_time()
+
+    def start_turn(self, start=None, cpu_start=None):
+        """
+        Starts the clock for a new turn, dropping whatever was recorded since the last line.
+        :param start: When the turn started (time.perf_counter), defaults to now
+        :param cpu_start: The CPU time (time.process_time) at that point, defaults to now
+        """
+        self._phases = {}
+        self._wall = time.perf_counter() if start is None else start
+        self._cpu = time.process_time() if cpu_start is None else cpu_start
+
+    @contextmanager
+    def phase(self, name, ships=0):
+        """
+        Times the code in the with block as a phase of the current turn.
+        :param name: The phase name
+        :param ships: How many ships the phase handles
+        """
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - wall, time.process_time() - cpu, ships)
+
+    def add(self, name, wall, cpu, ships=0):
+        """
+        Records a call of a phase timed elsewhere.
+        :param name: The phase name
+        :param wall: Seconds of wall time
+        :param cpu: Seconds of CPU time
+        :param ships: How many ships the call handled
+        """
+        stats = self._phases.get(name)
+        if stats is None:
+            stats = self._phases[name] = {"wall": 0.0, "cpu": 0.0, "calls": 0, "ships": 0}
+        stats["wall"] += wall
+        stats["cpu"] += cpu
+        stats["calls"] += 1
+        stats["ships"] += ships
+
+    def end_turn(self, turn_number, **extra):
+        """
+        Writes the line for the turn and starts on the next one.
+        :param turn_number: The turn the phases belong to
+        :param extra: Other values to add to the line
+        """
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        if self._file is not None:
+            line = {"turn": turn_number, "wall": wall - self._wall, "cpu": cpu - self._cpu, "phases": self._phases}
+            line.update(extra)
+            self._file.write(json.dumps(line) + "\n")
+            self._file.flush()
+        self._phases = {}
+        self._wall = wall
+        self._cpu = cpu
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def load(path):
+    """
+    :param path: A file written by TurnMetrics
+    :return: The lines of the file as dicts
+    """
+    with open(path) as metrics_file:
+        return [json.loads(line) for line in metrics_file if line.strip()]
+
+
+def percentiles(turns, key="wall", points=(50, 99)):
+    """
+    Percentiles of a phase value over the turns of a game; turns a phase did not run in are left out.
+    :param turns: The lines of a metrics file
+    :param key: The phase value, e.g. wall, cpu, calls or ships
+    :param points: The percentiles to compute
+    :return: Dict of phase name to a dict of percentile to value, plus "turn" for the whole turn
+    """
+    values = {"turn": [turn[key] for turn in turns if key in turn]}
+    for turn in turns:
+        for name, stats in turn["phases"].items():
+            values.setdefault(name, []).append(stats[key])
+    result = {}
+    for name, samples in values.items():
+        if not samples:
+            continue
+        samples.sort()
+        # Nearest rank
+        result[name] = {point: samples[min(len(samples) - 1, max(0, -(-point * len(samples) // 100) - 1))]
+                        for point in points}
+    return result
@@ -1,61 +1,90 @@
 import json
-import logging
 import sys
+import time
 
-from .common import read_input
+from .common import InputReader, read_input, read_ints
 from . import constants
 from .game_map import GameMap, Player
+from .logs import get_logger, setup_logging
+from .recording import Recorder, recording_path
+
+logger = get_logger(__name__)
 
 
 class Game:
     """
     The game object holds all metadata pertinent to the game and all its contents
     """
-    def __init__(self):
+    def __init__(self, reader=None, output=None):
         """
         Initiates a game object collecting all start-state instances for the contained items for pre-game.
-        Also sets up basic logging.
+        Also sets up logging, see hlt.logs for the level and mode, and starts
+        recording the game when asked to, see hlt.recording.
+        :param reader: The InputReader the engine's input comes from, defaults to one over stdin
+        :param output: Called with every line of commands instead of writing it to stdout,
+                       e.g. to play bots in the engine's process
         """
+        self._reader = reader or InputReader(sys.stdin.buffer)
+        self._output = output
+        # Records the game when the bot is asked to, see hlt.recording
+        self._recorder = None
         self.turn_number = 0
+        # Seconds spent reading and parsing the last frame
+        self.parse_time = 0
+        # When the last frame arrived (time.perf_counter), the engine's turn timer runs from there
+        self.frame_start = time.perf_counter()
+
+        record_path = recording_path()
+        if record_path:
+            self._recorder = Recorder()
+            self._reader.tee = self._recorder.input
 
         # Grab constants JSON
-        raw_constants = read_input()
+        raw_constants = read_input(self._reader)
         constants.load_constants(json.loads(raw_constants))
 
-        num_players, self.my_id = map(int, read_input().split())
+        num_players, self.my_id = map(int, read_input(self._reader).split())
 
-        logging.basicConfig(
-            filename="bot-{}.log".format(self.my_id),
-            filemode="w",
-            level=logging.DEBUG,
-        )
+        setup_logging("bot-{}.log".format(self.my_id))
+        if self._recorder is not None:
+            self._recorder.open(record_path.format(self.my_id))
 
         self.players = {}
         for player in range(num_players):
-            self.players[player] = Player._generate()
+            self.players[player] = Player._generate(self._reader)
         self.me = self.players[self.my_id]
-        self.game_map = GameMap._generate()
+        self.game_map = GameMap._generate(self._reader)
+        self.game_map.my_id = self.my_id
+        # Shipyards are read before the map size is known, swap in the interned positions
+        for player in self.players.values():
+            player.shipyard.position = self.game_map.normalize(player.shipyard.position)
+        self.game_map._refresh_window_sums()
 
     def ready(self, name):
         """
         Indicate that your bot is ready to play.
         :param name: The name of your bot
         """
-        send_commands([name])
+        send_commands([name], self._output, self._recorder)
 
     def update_frame(self):
         """
         Updates the game object's state.
         :returns: nothing.
         """
-        self.turn_number = int(read_input())
-        logging.info("=============== TURN {:03} ================".format(self.turn_number))
+        # Blocks until the engine sends the frame
+        self.turn_number, = read_ints(1, self._reader)
+        self.frame_start = time.perf_counter()
+        self.frame_cpu_start = time.process_time()
+        players, updates = self._read_frame()
+        self.parse_time = time.perf_counter() - self.frame_start
+        logger.info("=============== TURN {:03} ================", self.turn_number)
+        logger.debug("Frame parsed in {:.2f} ms", self.parse_time * 1000)
 
-        for _ in range(len(self.players)):
-            player, num_ships, num_dropoffs, halite = map(int, read_input().split())
-            self.players[player]._update(num_ships, num_dropoffs, halite)
+        for player, (halite, ships, dropoffs) in players.items():
+            self.players[player]._update(halite, ships, dropoffs, self.game_map.positions)
 
-        self.game_map._update()
+        self.game_map._update(updates)
 
         # Mark cells with ships as unsafe for navigation
         for player in self.players.values():
@@ -66,24 +95,49 @@ class Game:
             for dropoff in player.get_dropoffs():
                 self.game_map[dropoff.position].structure = dropoff
 
-    @staticmethod
-    def end_turn(commands):
+        self.game_map._refresh_window_sums()
+        self.game_map._refresh_inspiration()
+
+    def _read_frame(self):
+        """
+        Reads the rest of one turn's block of input from the engine, after the turn number,
+        parsing it straight into integers.
+        :return: A dict of player id to (halite, ships, dropoffs) and the cell updates.
+                 Ships (id, x, y, halite), dropoffs (id, x, y) and updates (x, y, halite) are flat lists.
+        """
+        players = {}
+        for _ in range(len(self.players)):
+            player, num_ships, num_dropoffs, halite = read_ints(4, self._reader)
+            entities = read_ints(4 * num_ships + 3 * num_dropoffs, self._reader)
+            players[player] = (halite, entities[:4 * num_ships], entities[4 * num_ships:])
+        num_updates, = read_ints(1, self._reader)
+        return players, read_ints(3 * num_updates, self._reader)
+
+    def end_turn(self, commands):
         """
         Method to send all commands to the game engine, effectively ending your turn.
         :param commands: Array of commands to send to engine
         :return: nothing.
         """
-        send_commands(commands)
+        send_commands(commands, self._output, self._recorder)
 
 
-def send_commands(commands):
+def send_commands(commands, output=None, recorder=None):
     """
     Sends a list of commands to the engine.
     :param commands: The list of commands to send.
+    :param output: Called with the line instead of writing it to stdout
+    :param recorder: The game's Recorder, if it is recorded
     :return: nothing.
     """
     if None in commands:
-        logging.error("We have a None type in commands!!!!!!!!!!!!!!")
-        logging.error("Here are the commands: {}".format(commands))
-    print(" ".join(commands))
+        logger.error("We have a None type in commands!!!!!!!!!!!!!!")
+        logger.error("Here are the commands: {}", commands)
+    line = " ".join(commands)
+    if recorder is not None:
+        recorder.commands(line)
+    if output is not None:
+        output(line)
+        return
+    print(line)
     sys.stdout.flush()
@@ -0,0 +1,113 @@
+import json
+import os
+
+from .common import command_line_option
+
+# Environment variable and command line option with the parameters, as a JSON object or a JSON file
+PARAMETERS_VARIABLE = "HALITE_PARAMS"
+PARAMETERS_OPTION = "--params"
+
+
+class Parameter:
+    """
+    A tunable value of a bot: its default and the range a search may try.
+    """
+
+    def __init__(self, name, default, low, high, description=""):
+        """
+        :param name: The attribute the value is read from
+        :param default: The value the bot plays with when not tuned, an int makes the parameter an integer
+        :param low: The lowest value to try
+        :param high: The highest value to try
+        :param description: What the value does
+        """
+        self.name = name
+        self.default = default
+        self.low = low
+        self.high = high
+        self.description = description
+
+    @property
+    def integer(self):
+        return isinstance(self.default, int)
+
+    def sample(self, rng):
+        """
+        :param rng: A random.Random
+        :return: A value drawn uniformly from the range
+        """
+        if self.integer:
+            return rng.randint(self.low, self.high)
+        return rng.uniform(self.low, self.high)
+
+    def convert(self, value):
+        """
+        :return: The value as the parameter's type
+        :raises ValueError: When it is not a number
+        """
+        return int(round(float(value))) if self.integer else float(value)
+
+
+class Parameters:
+    """
+    The thresholds a bot plays by, as attributes. Subclasses list their
+    parameters in SPACE; a value not given keeps its default, so a bot
+    without parameters plays as it always did.
+    """
+
+    SPACE = ()
+
+    def __init__(self, **values):
+        """
+        :param values: Values to play with instead of the defaults
+        :raises ValueError: For a name that is not in SPACE
+        """
+        known = {parameter.name: parameter for parameter in self.SPACE}
+        unknown = set(values) - set(known)
+        if unknown:
+            raise ValueError("Unknown parameters: {}".format(", ".join(sorted(unknown))))
+        for name, parameter in known.items():
+            setattr(self, name, parameter.convert(values[name]) if name in values else parameter.default)
+
+    def as_dict(self):
+        """
+        :return: Dict of every parameter to its value
+        """
+        return {parameter.name: getattr(self, parameter.name) for parameter in self.SPACE}
+
+    def changed(self):
+        """
+        :return: Dict of the parameters that differ from their default to their value
+        """
+        return {parameter.name: getattr(self, parameter.name) for parameter in self.SPACE
+                if getattr(self, parameter.name) != parameter.default}
+
+    @classmethod
+    def sample(cls, rng):
+        """
+        :param rng: A random.Random
+        :return: Parameters with every value drawn from its range
+        """
+        return cls(**{parameter.name: parameter.sample(rng) for parameter in cls.SPACE})
+
+    @classmethod
+    def from_settings(cls, argv=None, environ=None):
+        """
+        Reads the parameters given with --params or HALITE_PARAMS, either a
+        JSON object or the path of a file with one.
+        :param argv: The command line, defaults to sys.argv
+        :param environ: The environment, defaults to os.environ
+        :return: The Parameters, the defaults when none are given
+        """
+        environ = os.environ if environ is None else environ
+        setting = command_line_option(PARAMETERS_OPTION, argv) or environ.get(PARAMETERS_VARIABLE)
+        if not setting:
+            return cls()
+        if setting.lstrip().startswith("{"):
+            return cls(**json.loads(setting))
+        with open(setting) as parameters_file:
+            return cls(**json.load(parameters_file))
+
+    def __repr__(self):
+        return "{}({})".format(type(self).__name__, ", ".join(
+            "{}={!r}".format(name, value) for name, value in sorted(self.changed().items())))
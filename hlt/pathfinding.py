@@ -0,0 +1,398 @@
+from .logs import get_logger
+
+logger = get_logger(__name__)
+
+
+class PathFinder:
+    """
+    A* over the cell indices of a GameMap.
+
+    Scores and parents live in arrays allocated once per map. A generation
+    counter marks which entries belong to the current search, so nothing
+    gets cleared between searches. All costs are integers, which lets the
+    open set be a bucket queue keyed by f-score instead of a heap.
+
+    Moving off a cell costs its move cost plus step_cost. The heuristic is
+    step_cost times the wrap-around Manhattan distance, which is consistent.
+
+    find_timed_path searches over (cell, turn) instead, for planning a few
+    turns ahead around other ships' reservations, with buffers of its own
+    that grow with the number of turns.
+    """
+
+    def __init__(self, game_map, step_cost=10):
+        """
+        :param game_map: The map to search on
+        :param step_cost: Cost of a move on top of the halite it burns, i.e. what a turn is worth in halite
+        """
+        self.game_map = game_map
+        self.step_cost = step_cost
+        cells = game_map.width * game_map.height
+        self._xs = [index % game_map.width for index in range(cells)]
+        self._ys = [index // game_map.width for index in range(cells)]
+        self._cardinals = [indices[:4] for indices in game_map.neighbor_lists]
+        self._g = [0] * cells
+        self._parent = [0] * cells
+        self._seen = [0] * cells
+        self._closed = [0] * cells
+        # The same per (cell, turn) state, state turn * cells + cell
+        self._timed_g = []
+        self._timed_parent = []
+        self._timed_seen = []
+        self._timed_closed = []
+        self._generation = 0
+        self._costs = None
+        self._costs_version = None
+        self.expanded = 0
+
+    @property
+    def costs(self):
+        """
+        :return: The move cost of every cell as a list, refreshed when the map's costs change
+        """
+        game_map = self.game_map
+        if self._costs_version != game_map.costs_version:
+            self._costs = game_map.move_cost.tolist()
+            self._costs_version = game_map.costs_version
+        return self._costs
+
+    def find_path(self, start, goal, blocked=None, mover=None, excluded=None, limit=None):
+        """
+        Finds the cheapest path between two cells.
+        :param start: The cell index to start from
+        :param goal: The cell index to reach
+        :param blocked: Optional sequence indexed by cell index; a cell is blocked when its entry is truthy
+        :param mover: A blocked entry that is this object does not block (e.g. the ship itself)
+        :param excluded: Optional cell index never to enter
+        :param limit: Optional number of cells to expand at most before giving up
+        :return: The cell indices from start to goal, both included, or None if goal can't be reached
+        """
+        game_map = self.game_map
+        costs = self.costs
+        cardinals = self._cardinals
+        xs, ys = self._xs, self._ys
+        width, height = game_map.width, game_map.height
+        step_cost = self.step_cost
+        g, parent, seen, closed = self._g, self._parent, self._seen, self._closed
+        self._generation += 1
+        generation = self._generation
+
+        goal_x, goal_y = xs[goal], ys[goal]
+        distance_x = abs(xs[start] - goal_x)
+        distance_y = abs(ys[start] - goal_y)
+        f = (min(distance_x, width - distance_x) + min(distance_y, height - distance_y)) * step_cost
+        seen[start] = generation
+        g[start] = 0
+        parent[start] = -1
+        buckets = {f: [start]}
+        pending = 1
+        expanded = 0
+        while pending:
+            bucket = buckets.get(f)
+            if not bucket:
+                buckets.pop(f, None)
+                f += 1
+                continue
+            cell = bucket.pop()
+            pending -= 1
+            if closed[cell] == generation:
+                continue
+            closed[cell] = generation
+            expanded += 1
+            if cell == goal:
+                self.expanded = expanded
+                return self._path(goal)
+            if expanded == limit:
+                break
+            cost = g[cell] + costs[cell] + step_cost
+            for next_cell in cardinals[cell]:
+                if closed[next_cell] == generation or next_cell == excluded:
+                    continue
+                if blocked is not None:
+                    occupant = blocked[next_cell]
+                    if occupant and occupant is not mover:
+                        continue
+                if seen[next_cell] != generation or cost < g[next_cell]:
+                    seen[next_cell] = generation
+                    g[next_cell] = cost
+                    parent[next_cell] = cell
+                    distance_x = abs(xs[next_cell] - goal_x)
+                    distance_y = abs(ys[next_cell] - goal_y)
+                    next_f = cost + (min(distance_x, width - distance_x) +
+                                     min(distance_y, height - distance_y)) * step_cost
+                    next_bucket = buckets.get(next_f)
+                    if next_bucket is None:
+                        buckets[next_f] = [next_cell]
+                    else:
+                        next_bucket.append(next_cell)
+                    pending += 1
+        self.expanded = expanded
+        return None
+
+    def find_timed_path(self, start, goal, depth, reserved, blocked=None, crowded=(), crowd_cost=0,
+                        turn_cost=None):
+        """
+        Space-time A* from start towards goal over (cell, turn), where staying
+        put is a move as well. Every turn costs turn_cost, leaving a cell its
+        move cost on top.
+        :param start: The cell index to start from, on turn 0
+        :param goal: The cell index to head for
+        :param depth: How many turns ahead to search
+        :param reserved: Container of the states not to enter, a state being turn * cells + cell index
+        :param blocked: Optional sequence indexed by cell index; a cell other than start is not entered
+                        when its entry is truthy
+        :param crowded: Cell indices that cost crowd_cost more to enter on turn 1, e.g. with ships yet to move
+        :param crowd_cost: See crowded
+        :param turn_cost: What a turn is worth in halite, defaults to step_cost
+        :return: The cell indices on turns 1, 2, ... up to goal, or as deep and then as close to it as the
+                 window allows; None if every first step is reserved
+        """
+        game_map = self.game_map
+        costs = self.costs
+        neighbors = game_map.neighbor_lists
+        xs, ys = self._xs, self._ys
+        width, height = game_map.width, game_map.height
+        turn_cost = self.step_cost if turn_cost is None else turn_cost
+        cells = len(xs)
+        size = (depth + 1) * cells
+        if len(self._timed_g) < size:
+            grow = [0] * (size - len(self._timed_g))
+            for buffer in (self._timed_g, self._timed_parent, self._timed_seen, self._timed_closed):
+                buffer.extend(grow)
+        g, parent = self._timed_g, self._timed_parent
+        seen, closed = self._timed_seen, self._timed_closed
+        self._generation += 1
+        generation = self._generation
+
+        goal_x, goal_y = xs[goal], ys[goal]
+
+        def distance(cell):
+            distance_x = abs(xs[cell] - goal_x)
+            distance_y = abs(ys[cell] - goal_y)
+            return min(distance_x, width - distance_x) + min(distance_y, height - distance_y)
+
+        f = distance(start) * turn_cost
+        seen[start] = generation
+        g[start] = 0
+        parent[start] = -1
+        buckets = {f: [start]}
+        pending = 1
+        expanded = 0
+        best = best_key = None
+        while pending:
+            bucket = buckets.get(f)
+            if not bucket:
+                buckets.pop(f, None)
+                f += 1
+                continue
+            state = bucket.pop()
+            pending -= 1
+            if closed[state] == generation:
+                continue
+            closed[state] = generation
+            expanded += 1
+            turn, cell = divmod(state, cells)
+            if turn > 0:
+                if cell == goal:
+                    best = state
+                    break
+                # Without reaching the goal, go as deep and as close as possible
+                key = (depth - turn, distance(cell), g[state])
+                if best is None or key < best_key:
+                    best, best_key = state, key
+            if turn == depth:
+                continue
+            stay_cost = g[state] + turn_cost
+            leave_cost = stay_cost + costs[cell]
+            next_turn = (turn + 1) * cells
+            for next_cell in neighbors[cell]:
+                next_state = next_turn + next_cell
+                if closed[next_state] == generation or next_state in reserved:
+                    continue
+                if blocked is not None and blocked[next_cell] and next_cell != start:
+                    continue
+                cost = stay_cost if next_cell == cell else leave_cost
+                if turn == 0 and next_cell in crowded:
+                    cost += crowd_cost
+                if seen[next_state] != generation or cost < g[next_state]:
+                    seen[next_state] = generation
+                    g[next_state] = cost
+                    parent[next_state] = state
+                    distance_x = abs(xs[next_cell] - goal_x)
+                    distance_y = abs(ys[next_cell] - goal_y)
+                    next_f = cost + (min(distance_x, width - distance_x) +
+                                     min(distance_y, height - distance_y)) * turn_cost
+                    next_bucket = buckets.get(next_f)
+                    if next_bucket is None:
+                        buckets[next_f] = [next_state]
+                    else:
+                        next_bucket.append(next_state)
+                    pending += 1
+        self.expanded = expanded
+        if best is None:
+            return None
+        path = []
+        while best >= cells:
+            path.append(best % cells)
+            best = parent[best]
+        path.reverse()
+        return path
+
+    def _path(self, goal):
+        path = []
+        cell = goal
+        while cell != -1:
+            path.append(cell)
+            cell = self._parent[cell]
+        path.reverse()
+        return path
+
+
+class PathCache:
+    """
+    The paths of our ships to their targets, kept across turns and repaired
+    in place, in the spirit of D* Lite.
+
+    A ship's path is planned in full once for its target. On later turns
+    the part it walked is dropped and the rest is checked: cells within
+    sense_radius steps that another ship now blocks, and cells anywhere on
+    the path whose move cost went up by more than tolerance since it was
+    planned. Each run of such cells is spliced out with a small search from
+    the cell before it to the cell after it, limited to repair_limit
+    expanded cells. A ship that was pushed off its path rejoins it a couple
+    of cells ahead the same way. Only a new target, a repair that fails or
+    a blocked target means a full search. Cells that got cheaper are left
+    alone, so a kept path can be a little worse than a fresh one.
+
+    Paths of ships that did not ask for one during a turn are dropped at
+    the next, so dead ships do not pile up.
+    """
+
+    def __init__(self, game_map, sense_radius=4, tolerance=None, repair_limit=200):
+        """
+        :param game_map: The map the paths are on
+        :param sense_radius: How many steps ahead other ships are checked for
+        :param tolerance: How much a cell's move cost may rise before the path goes around it,
+                          defaults to the path finder's step cost
+        :param repair_limit: Most cells a repair may expand before a full search is done instead
+        """
+        self.game_map = game_map
+        self.sense_radius = sense_radius
+        self.tolerance = game_map.pathfinder.step_cost if tolerance is None else tolerance
+        self.repair_limit = repair_limit
+        # Ship id to (goal, path, the move cost of every path cell when it was planned)
+        self._paths = {}
+        self._used = set()
+        self.stats = self._new_stats()
+        self.last_stats = {}
+
+    @staticmethod
+    def _new_stats():
+        return {"kept": 0, "repaired": 0, "planned": 0, "expanded": 0}
+
+    def new_turn(self):
+        """
+        Drops the paths no ship asked for during the last turn and starts counting again.
+        :return: nothing
+        """
+        for ship_id in self._paths.keys() - self._used:
+            del self._paths[ship_id]
+        self._used = set()
+        self.last_stats = self.stats
+        self.stats = self._new_stats()
+        logger.debug("Path cache: {}", self.last_stats)
+
+    def forget(self, ship_id):
+        """
+        Makes the next path of a ship a full search.
+        """
+        self._paths.pop(ship_id, None)
+
+    def find_path(self, ship, goal, blocked=None):
+        """
+        :param ship: The ship to move
+        :param goal: The cell index to reach
+        :param blocked: Optional sequence indexed by cell index; a cell is blocked when its entry is truthy
+                        and not the ship itself
+        :return: The cell indices from the ship's cell to goal, both included, or None if goal can't be reached
+        """
+        start = self.game_map.cell_index(ship.position)
+        self._used.add(ship.id)
+        entry = self._paths.get(ship.id)
+        if entry is not None and entry[0] == goal:
+            path = self._repair(entry, start, blocked, ship)
+            if path is not None:
+                return path
+        pathfinder = self.game_map.pathfinder
+        path = pathfinder.find_path(start, goal, blocked, ship)
+        self.stats["planned"] += 1
+        self.stats["expanded"] += pathfinder.expanded
+        if path is None:
+            self._paths.pop(ship.id, None)
+            return None
+        costs = pathfinder.costs
+        self._paths[ship.id] = (goal, path, [costs[cell] for cell in path])
+        return list(path)
+
+    def _repair(self, entry, start, blocked, ship):
+        """
+        Brings a kept path up to date.
+        :return: The path from start, or None when a full search is needed
+        """
+        goal, path, planned = entry
+        repaired = False
+        if path[0] == start:
+            pass
+        elif len(path) > 1 and path[1] == start:
+            path, planned = path[1:], planned[1:]
+        else:
+            # Pushed off the path, rejoin it a couple of cells ahead
+            join = min(2, len(path) - 1)
+            detour = self._search(start, path[join], blocked, ship)
+            if detour is None:
+                return None
+            costs = self.game_map.pathfinder.costs
+            path = detour + path[join + 1:]
+            planned = [costs[cell] for cell in detour] + planned[join + 1:]
+            repaired = True
+
+        costs = self.game_map.pathfinder.costs
+        tolerance = self.tolerance
+
+        def changed(index):
+            cell = path[index]
+            if costs[cell] > planned[index] + tolerance:
+                return True
+            if blocked is not None and index <= self.sense_radius:
+                occupant = blocked[cell]
+                return bool(occupant) and occupant is not ship
+            return False
+
+        index = 1
+        while index < len(path):
+            if not changed(index):
+                index += 1
+                continue
+            end = index + 1
+            while end < len(path) and changed(end):
+                end += 1
+            if end == len(path):
+                # The goal itself changed
+                return None
+            detour = self._search(path[index - 1], path[end], blocked, ship)
+            if detour is None:
+                return None
+            path = path[:index - 1] + detour + path[end + 1:]
+            planned = planned[:index - 1] + [costs[cell] for cell in detour] + planned[end + 1:]
+            index += len(detour) - 1
+            repaired = True
+
+        self._paths[ship.id] = (goal, path, planned)
+        self.stats["repaired" if repaired else "kept"] += 1
+        return list(path)
+
+    def _search(self, start, goal, blocked, ship):
+        pathfinder = self.game_map.pathfinder
+        path = pathfinder.find_path(start, goal, blocked, ship, limit=self.repair_limit)
+        self.stats["expanded"] += pathfinder.expanded
+        return path
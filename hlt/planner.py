@@ -0,0 +1,193 @@
+import time
+
+from .logs import get_logger
+from .positionals import Direction, NEIGHBOR_DIRECTIONS
+
+logger = get_logger(__name__)
+
+
+class MovePlanner:
+    """
+    Cooperative move planner for a fleet of own ships.
+
+    Ships are planned one by one in priority order with a space-time A* over
+    (cell, turn) for a few turns ahead, see PathFinder.find_timed_path. Each
+    plan reserves its cells in a reservation table that the later ships plan
+    around. Two ships may swap
+    cells, since the engine only destroys ships that end up on the same cell.
+    Once the time limit is hit, the remaining ships get a cheap one-step
+    move. A repair pass then makes sure no two ships end on the same cell.
+    """
+
+    def __init__(self, game_map, depth=4, time_limit=0.2, turn_cost=None):
+        """
+        :param game_map: The map to plan on
+        :param depth: How many turns ahead to plan
+        :param time_limit: Seconds to spend searching before falling back to one-step moves
+        :param turn_cost: What a turn is worth in halite, defaults to the path finder's step cost
+        """
+        self.game_map = game_map
+        self.depth = depth
+        self.time_limit = time_limit
+        self.turn_cost = game_map.pathfinder.step_cost if turn_cost is None else turn_cost
+        self.last_stats = {}
+
+    def plan(self, ships, targets, priorities=None, reserved=(), blocked=(), stack_cells=()):
+        """
+        Plans this turn's move for every ship.
+        :param ships: The own ships to move
+        :param targets: Dict of ship id to the position that ship heads for
+        :param priorities: Dict of ship id to priority, higher goes first. Defaults to the order of ships
+        :param reserved: Cell indices other own ships end this turn on; they are assumed to stay there
+        :param blocked: Cell indices not to move into, e.g. next to enemy ships
+        :param stack_cells: Cell indices several ships may end on, e.g. dropoffs at the end of the game
+        :return: Dict of ship id to Direction, conflict-free
+        """
+        start_time = time.perf_counter()
+        game_map = self.game_map
+        if priorities is not None:
+            ships = sorted(ships, key=lambda ship: -priorities.get(ship.id, 0))
+        starts = {ship.id: game_map.cell_index(ship.position) for ship in ships}
+        stack_cells = set(stack_cells)
+        blocked = set(blocked)
+        blocked_cells = bytearray(len(game_map.positions))
+        for index in blocked:
+            blocked_cells[index] = 1
+        # (cell, turn) as turn * cells + cell index to the ship ending there, None for other ships
+        reservations = {}
+        for index in reserved:
+            if index not in stack_cells:
+                for turn in range(1, self.depth + 1):
+                    reservations[self._state(index, turn)] = None
+        # Ships that can't pay to move stay put, whatever their priority
+        moves = {}
+        for ship in ships:
+            start = starts[ship.id]
+            if ship.halite_amount < game_map.move_cost[start]:
+                moves[ship.id] = start
+                self._reserve(reservations, [start], ship.id, stack_cells)
+        unplanned = {starts[ship.id] for ship in ships if ship.id not in moves}
+
+        pathfinder = game_map.pathfinder
+        searched = fallback = expanded = 0
+        for ship in ships:
+            if ship.id in moves:
+                continue
+            start = starts[ship.id]
+            unplanned.discard(start)
+            target = targets.get(ship.id)
+            goal = start if target is None else game_map.cell_index(target)
+            if time.perf_counter() - start_time < self.time_limit:
+                # Another of our ships on the first step will have to make room
+                path = pathfinder.find_timed_path(start, goal, self.depth, reservations, blocked_cells,
+                                                  unplanned, 2 * self.turn_cost, self.turn_cost)
+                searched += 1
+                expanded += pathfinder.expanded
+            else:
+                path = None
+            if path is None:
+                path = [self._step(start, goal, reservations, blocked)]
+                fallback += 1
+            moves[ship.id] = path[0]
+            self._reserve(reservations, path, ship.id, stack_cells)
+
+        repaired = self._repair(ships, starts, moves, set(reserved) - stack_cells, blocked, stack_cells)
+        directions = {ship.id: self._direction(starts[ship.id], moves[ship.id]) for ship in ships}
+        self.last_stats = {
+            "ships": len(ships),
+            "searched": searched,
+            "fallback": fallback,
+            "expanded": expanded,
+            "repaired": repaired,
+            "time": time.perf_counter() - start_time,
+        }
+        logger.debug("Move planner: {}", self.last_stats)
+        return directions
+
+    def commands(self, ships, directions):
+        """
+        :return: The engine commands for the planned directions
+        """
+        return [ship.move(directions[ship.id]) for ship in ships if ship.id in directions]
+
+    def _state(self, index, turn):
+        return turn * len(self.game_map.positions) + index
+
+    def _reserve(self, reservations, path, ship_id, stack_cells):
+        # The ship is assumed to stay on its last cell for the rest of the window
+        for turn in range(1, self.depth + 1):
+            index = path[min(turn, len(path)) - 1]
+            if index not in stack_cells:
+                reservations[self._state(index, turn)] = ship_id
+
+    def _step(self, start, goal, reservations, blocked):
+        """
+        One-step fallback: stay if possible, otherwise the free neighbor closest to goal.
+        """
+        if self._state(start, 1) not in reservations:
+            return start
+        distance = self.game_map.index_distance
+        free = [index for index in self.game_map.neighbor_lists[start][:4]
+                if self._state(index, 1) not in reservations and index not in blocked]
+        return min(free, key=lambda index: distance(index, goal)) if free else start
+
+    def _repair(self, ships, starts, moves, fixed, blocked, stack_cells):
+        """
+        Sends movers that would end on the same cell as another ship back to
+        their own cell, until no two ships share a cell. A ship that would
+        have another ship land on it gets out of the way if it can pay for
+        it. Movers still in a conflict after the last pass stay put.
+        :param fixed: Cell indices other own ships end on
+        :return: How many moves were changed
+        """
+        move_cost = self.game_map.move_cost
+        cargo = {ship.id: ship.halite_amount for ship in ships}
+        repaired = 0
+        for _ in range(len(ships) + 1):
+            arrivals, conflicts = self._conflicts(ships, moves, fixed, stack_cells)
+            if not conflicts:
+                return repaired
+            for index in conflicts:
+                for ship_id in list(arrivals[index]):
+                    if starts[ship_id] != index:
+                        moves[ship_id] = starts[ship_id]
+                        repaired += 1
+                    elif index in fixed and cargo[ship_id] >= move_cost[index]:
+                        # Something else lands on this ship's cell, get out of the way
+                        free = [neighbor for neighbor in self.game_map.neighbor_lists[index][:4]
+                                if neighbor not in arrivals and neighbor not in fixed and neighbor not in blocked]
+                        if free:
+                            moves[ship_id] = free[0]
+                            arrivals[free[0]] = [ship_id]
+                            repaired += 1
+
+        # Out of passes: every mover in a conflict stays, until none is left
+        while True:
+            arrivals, conflicts = self._conflicts(ships, moves, fixed, stack_cells)
+            stuck = [ship_id for index in conflicts for ship_id in arrivals[index] if starts[ship_id] != index]
+            if not stuck:
+                break
+            for ship_id in stuck:
+                moves[ship_id] = starts[ship_id]
+                repaired += 1
+        if conflicts:
+            logger.warning("Move planner: ships stay on cells others end on: {}", conflicts)
+        return repaired
+
+    @staticmethod
+    def _conflicts(ships, moves, fixed, stack_cells):
+        """
+        :return: Dict of cell index to the ships ending on it, and the cells more than one ship ends on
+        """
+        arrivals = {}
+        for ship in ships:
+            arrivals.setdefault(moves[ship.id], []).append(ship.id)
+        conflicts = [index for index, ship_ids in arrivals.items()
+                     if index not in stack_cells and (len(ship_ids) > 1 or index in fixed)]
+        return arrivals, conflicts
+
+    def _direction(self, start, end):
+        for direction, index in zip(NEIGHBOR_DIRECTIONS, self.game_map.neighbor_lists[start]):
+            if index == end:
+                return direction
+        return Direction.Still
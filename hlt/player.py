@@ -5,13 +5,22 @@ from .common import read_input
 class Player:
     """
     Player object containing all items/metadata pertinent to the player.
+
+    Ship and dropoff objects are kept from turn to turn and updated in place.
+    After every update spawned, destroyed and moved hold the ids of the ships
+    that appeared, disappeared or changed position since the previous turn.
     """
+    __slots__ = ("id", "shipyard", "halite_amount", "_ships", "_dropoffs", "spawned", "destroyed", "moved")
+
     def __init__(self, player_id, shipyard, halite=0):
         self.id = player_id
         self.shipyard = shipyard
         self.halite_amount = halite
         self._ships = {}
         self._dropoffs = {}
+        self.spawned = set()
+        self.destroyed = set()
+        self.moved = set()
 
     def get_ship(self, ship_id):
         """
@@ -55,22 +64,48 @@ class Player:
 
 
     @staticmethod
-    def _generate():
+    def _generate(reader):
         """
         Creates a player object from the input given by the game engine
+        :param reader: The InputReader to read from
         :return: The player object
         """
-        player, shipyard_x, shipyard_y = map(int, read_input().split())
+        player, shipyard_x, shipyard_y = map(int, read_input(reader).split())
         return Player(player, Shipyard(player, -1, Position(shipyard_x, shipyard_y)))
 
-    def _update(self, num_ships, num_dropoffs, halite):
+    def _update(self, halite, ships, dropoffs, positions):
         """
         Updates this player object considering the input from the game engine for the current specific turn.
-        :param num_ships: The number of ships this player has this turn
-        :param num_dropoffs: The number of dropoffs this player has this turn
         :param halite: How much halite the player has in total
+        :param ships: The player's ships this turn, as a flat list of id, x, y, halite
+        :param dropoffs: The player's dropoffs this turn, as a flat list of id, x, y
+        :param positions: The PositionGrid of the game's map
         :return: nothing.
         """
         self.halite_amount = halite
-        self._ships = {id: ship for (id, ship) in [Ship._generate(self.id) for _ in range(num_ships)]}
-        self._dropoffs = {id: dropoff for (id, dropoff) in [Dropoff._generate(self.id) for _ in range(num_dropoffs)]}
+        interned = positions.at
+        previous = self._ships
+        current = {}
+        spawned = set()
+        moved = set()
+        for ship_id, x, y, cargo in zip(ships[0::4], ships[1::4], ships[2::4], ships[3::4]):
+            position = interned(x, y)
+            ship = previous.get(ship_id)
+            if ship is None:
+                ship = Ship(self.id, ship_id, position, cargo)
+                spawned.add(ship_id)
+            else:
+                if ship.position != position:
+                    ship.position = position
+                    moved.add(ship_id)
+                ship.halite_amount = cargo
+            current[ship_id] = ship
+        self.destroyed = previous.keys() - current.keys()
+        self.spawned = spawned
+        self.moved = moved
+        self._ships = current
+
+        self._dropoffs = {
+            dropoff_id: self._dropoffs.get(dropoff_id) or Dropoff(self.id, dropoff_id, interned(x, y))
+            for dropoff_id, x, y in zip(dropoffs[0::3], dropoffs[1::3], dropoffs[2::3])
+        }
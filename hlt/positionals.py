@@ -61,19 +61,46 @@ class Direction:
             raise IndexError
 
 
+# The column order of PositionGrid.neighbor_indices
+NEIGHBOR_DIRECTIONS = [Direction.North, Direction.South, Direction.East, Direction.West, Direction.Still]
+_DIRECTION_COLUMNS = {direction: column for column, direction in enumerate(NEIGHBOR_DIRECTIONS)}
+# Wider than any map and odd, so every cell hashes apart and the low bits dicts probe with vary
+_HASH_STRIDE = 1031
+
+
 class Position:
-    def __init__(self, x, y):
+    """
+    A position on the map.
+
+    Positions handed out by the map (cells, ships, dropoffs) are interned:
+    every map has one normalized Position per cell, which knows its map's
+    grid and its cell index and stepping from it stays on the map. Positions
+    built by hand or by arithmetic are plain and may lie outside the map.
+
+    Positions hash by their coordinates with a fixed stride, whatever map
+    they are on, so both kinds can be mixed as dict and set keys.
+    Positions must not be mutated.
+    """
+    __slots__ = ("x", "y", "index", "_grid")
+
+    def __init__(self, x, y, index=-1, grid=None):
         self.x = x
         self.y = y
-        self._neighbors = None
+        self.index = index
+        self._grid = grid
 
     def directional_offset(self, direction):
         """
         Returns the position considering a Direction cardinal tuple
         :param direction: the direction cardinal tuple
-        :return: a new position moved in that direction
+        :return: a position moved in that direction, wrapped around the map for interned positions
         """
-        return self + Position(*direction)
+        if self._grid is not None:
+            column = _DIRECTION_COLUMNS.get(direction)
+            if column is not None:
+                return self._grid.positions[self._grid.neighbor_indices[self.index][column]]
+            return self._grid.at(self.x + direction[0], self.y + direction[1])
+        return Position(self.x + direction[0], self.y + direction[1])
 
     def directional(self, position):
         """
@@ -81,19 +108,18 @@ class Position:
         :param position: the position to check
         :return: a direction if found else None
         """
-        if position not in self.neighbors():
-            return None
         for current_direction in Direction.get_all_cardinals():
             if self.directional_offset(current_direction) == position:
                 return current_direction
+        return None
 
     def neighbors(self):
         """
         :return: Returns a list of all positions around this specific position in each cardinal direction
         """
-        if self._neighbors is None:
-            self._neighbors = [self.directional_offset(current_direction) for current_direction in Direction.get_all_cardinals()]
-        return self._neighbors
+        if self._grid is not None:
+            return self._grid.cardinal_neighbors[self.index]
+        return [self.directional_offset(current_direction) for current_direction in Direction.get_all_cardinals()]
 
     def __add__(self, other):
         return Position(self.x + other.x, self.y + other.y)
@@ -101,32 +127,66 @@ class Position:
     def __sub__(self, other):
         return Position(self.x - other.x, self.y - other.y)
 
-    def __iadd__(self, other):
-        self.x += other.x
-        self.y += other.y
-        return self
-
-    def __isub__(self, other):
-        self.x -= other.x
-        self.y -= other.y
-        return self
-
     def __abs__(self):
         return Position(abs(self.x), abs(self.y))
 
     def __eq__(self, other):
+        if self is other:
+            return True
+        if not isinstance(other, Position):
+            return NotImplemented
         return self.x == other.x and self.y == other.y
 
     def __ne__(self, other):
-        return not self.__eq__(other)
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
 
     def __lt__(self, other):
         return self.x < other.x or self.y < other.y
 
     def __hash__(self):
-        return hash("{}|{}".format(self.x, self.y))
+        return self.y * _HASH_STRIDE + self.x
 
     def __repr__(self):
         return "{}({}, {})".format(self.__class__.__name__,
                                    self.x,
                                    self.y)
+
+
+class PositionGrid:
+    """
+    The interned positions of one map, one per cell in cell index order.
+    Every GameMap builds its own, so bots sharing a process never see each
+    other's positions.
+
+    neighbor_indices holds, for every cell, the wrapped cell indices of its
+    North, South, East and West neighbors followed by its own index (Still),
+    and cardinal_neighbors the matching interned positions.
+    """
+    __slots__ = ("width", "height", "positions", "neighbor_indices", "cardinal_neighbors")
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        # One int object per cell index, shared by every table below
+        indices = list(range(width * height))
+        self.positions = [Position(x, y, indices[y * width + x], self)
+                          for y in range(height) for x in range(width)]
+        self.neighbor_indices = [
+            tuple(indices[((position.y + dy) % height) * width + (position.x + dx) % width]
+                  for dx, dy in NEIGHBOR_DIRECTIONS)
+            for position in self.positions]
+        self.cardinal_neighbors = [tuple(self.positions[index] for index in neighbors[:4])
+                                   for neighbors in self.neighbor_indices]
+
+    def at(self, x, y):
+        """
+        :return: The interned position for these coordinates, wrapped around the map
+        """
+        return self.positions[(y % self.height) * self.width + x % self.width]
+
+    def __getitem__(self, index):
+        return self.positions[index]
+
+    def __len__(self):
+        return len(self.positions)
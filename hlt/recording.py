@@ -0,0 +1,136 @@
+import atexit
+import gzip
+import io
+import os
+import struct
+import zlib
+
+from .common import command_line_option
+
+# Environment variable and command line option with the file to record a game to,
+# "{}" in it is replaced by the player id
+RECORD_VARIABLE = "HALITE_RECORD"
+RECORD_OPTION = "--record"
+
+MAGIC = b"HLTREC1\n"
+# A record is its kind followed by the length of its payload
+HEADER = struct.Struct("<cI")
+INPUT = b"I"
+COMMANDS = b"C"
+
+
+def recording_path(argv=None, environ=None):
+    """
+    :param argv: The command line, defaults to sys.argv
+    :param environ: The environment, defaults to os.environ
+    :return: The file to record the game to, None to not record it
+    """
+    environ = os.environ if environ is None else environ
+    return command_line_option(RECORD_OPTION, argv) or environ.get(RECORD_VARIABLE) or None
+
+
+class Recorder:
+    """
+    Records the raw engine input and the commands the bot sends as a
+    gzipped stream of records, which Recording reads back.
+
+    The input is recorded from the first read, before the player id and
+    with it the file name is known, so records are kept in memory until
+    the file is opened.
+    """
+
+    def __init__(self):
+        self._file = None
+        self._pending = []
+
+    def open(self, path):
+        """
+        Starts writing to a file, including what was recorded so far.
+        :param path: The file to write, it is overwritten
+        :return: nothing
+        """
+        self._file = gzip.open(path, "wb", compresslevel=6)
+        self._file.write(MAGIC)
+        for kind, payload in self._pending:
+            self._write(kind, payload)
+        self._pending = []
+        atexit.register(self.close)
+
+    def input(self, chunk):
+        """
+        :param chunk: Bytes read from the engine
+        """
+        self._write(INPUT, chunk)
+
+    def commands(self, line):
+        """
+        Records a line sent to the engine and makes the recording so far readable.
+        :param line: The line without its line ending
+        """
+        self._write(COMMANDS, line.encode())
+        if self._file is not None:
+            # A sync flush is cheap and keeps the file usable if the bot crashes
+            self._file.flush(zlib.Z_SYNC_FLUSH)
+
+    def _write(self, kind, payload):
+        if self._file is None:
+            self._pending.append((kind, payload))
+            return
+        self._file.write(HEADER.pack(kind, len(payload)))
+        self._file.write(payload)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class Recording:
+    """
+    A recorded game: the engine's input as one byte string and every line
+    the bot sent, starting with the line with its name.
+    """
+
+    def __init__(self, input_data, commands):
+        self.input = input_data
+        self.commands = commands
+
+    @property
+    def turns(self):
+        """
+        :return: The command lines of the turns the bot played
+        """
+        return self.commands[1:]
+
+    def input_stream(self):
+        """
+        :return: A buffered binary stream with the engine input, e.g. for a Game's hlt.common.InputReader
+        """
+        return io.BufferedReader(io.BytesIO(self.input))
+
+    @classmethod
+    def load(cls, path):
+        """
+        Reads a recording, including one cut short by a crashed bot.
+        :param path: A file written by Recorder
+        :return: The Recording
+        """
+        with open(path, "rb") as recording_file:
+            data = zlib.decompressobj(16 + zlib.MAX_WBITS).decompress(recording_file.read())
+        if not data.startswith(MAGIC):
+            raise ValueError("{} is not a game recording".format(path))
+        chunks = []
+        commands = []
+        offset = len(MAGIC)
+        while offset + HEADER.size <= len(data):
+            kind, length = HEADER.unpack_from(data, offset)
+            offset += HEADER.size
+            payload = data[offset:offset + length]
+            if len(payload) < length:
+                break
+            offset += length
+            if kind == INPUT:
+                chunks.append(payload)
+            elif kind == COMMANDS:
+                commands.append(payload.decode())
+        return cls(b"".join(chunks), commands)
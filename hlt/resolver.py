@@ -0,0 +1,111 @@
+import time
+
+from .logs import get_logger
+
+logger = get_logger(__name__)
+
+
+class MoveResolver:
+    """
+    Turns the moves our ships want into moves where no two ships end on the same cell.
+
+    Every ship has a list of cells it could end on, best first and its own
+    cell last. The resolver builds the destination conflict graph once: which
+    ships want which cell. It then works through the cells more than one ship
+    wants. The ship staying on its own cell keeps it, otherwise the ship with
+    the highest priority does, and the others fall back to their next cell.
+    That handles chains, where a ship that cannot move sends the ships
+    queueing behind it back one by one. Cycles and swaps need nothing, since
+    the engine only destroys ships that end on the same cell.
+
+    Every ship only ever falls back and its own cell is always there in the
+    end, as nobody else starts on it, so the result is collision-free. The
+    work is bounded by the options, at most six per ship, with no recursion
+    and no new path searches.
+    """
+
+    def __init__(self, game_map):
+        """
+        :param game_map: The map the ships are on
+        """
+        self.game_map = game_map
+        self.last_stats = {}
+
+    def options(self, start, step, goal, blocked=()):
+        """
+        The cells a ship could end on, for when its next step is taken.
+        :param start: The cell index the ship is on
+        :param step: The cell index it wants to move to
+        :param goal: The cell index it heads for
+        :param blocked: Cell indices not to move into, e.g. those with enemy ships
+        :return: The step, the other neighbors that are no farther from the goal, closest first, and start
+        """
+        distance = self.game_map.index_distance
+        current = distance(start, goal)
+        detours = sorted((index for index in self.game_map.neighbor_lists[start][:4]
+                          if index != step and index not in blocked and distance(index, goal) <= current),
+                         key=lambda index: distance(index, goal))
+        return [step] + detours + [start]
+
+    def resolve(self, ships, options, priorities=None):
+        """
+        :param ships: The own ships to move
+        :param options: Dict of ship id to the cell indices it could end on, best first. The ship's own cell
+                        is added at the end when missing, and the options after it are never used
+        :param priorities: Dict of ship id to priority, the higher wins a contested cell
+        :return: Dict of ship id to the cell index it ends on
+        """
+        start_time = time.perf_counter()
+        priorities = priorities or {}
+        starts = {}
+        choices = {}
+        for ship in ships:
+            start = self.game_map.cell_index(ship.position)
+            cells = list(options.get(ship.id, ()))
+            if start in cells:
+                del cells[cells.index(start) + 1:]
+            else:
+                cells.append(start)
+            starts[ship.id] = start
+            choices[ship.id] = cells
+
+        # The conflict graph: every cell to the ships that end on it
+        chosen = dict.fromkeys(choices, 0)
+        arrivals = {}
+        for ship_id, cells in choices.items():
+            arrivals.setdefault(cells[0], []).append(ship_id)
+        pending = [index for index, ship_ids in arrivals.items() if len(ship_ids) > 1]
+        conflicts = len(pending)
+
+        iterations = fallbacks = 0
+        while pending:
+            index = pending.pop()
+            ship_ids = arrivals[index]
+            if len(ship_ids) < 2:
+                continue
+            iterations += 1
+            staying = [ship_id for ship_id in ship_ids if starts[ship_id] == index]
+            winner = staying[0] if staying else max(
+                ship_ids, key=lambda ship_id: (priorities.get(ship_id, 0), -ship_id))
+            arrivals[index] = [winner]
+            for ship_id in ship_ids:
+                if ship_id == winner:
+                    continue
+                # A ship that loses is not on its own cell, so it has options left
+                chosen[ship_id] += 1
+                fallbacks += 1
+                fallback = choices[ship_id][chosen[ship_id]]
+                arriving = arrivals.setdefault(fallback, [])
+                arriving.append(ship_id)
+                if len(arriving) == 2:
+                    pending.append(fallback)
+
+        self.last_stats = {
+            "ships": len(ships),
+            "conflicts": conflicts,
+            "iterations": iterations,
+            "fallbacks": fallbacks,
+            "time": time.perf_counter() - start_time,
+        }
+        logger.info("Move resolver: {}", self.last_stats)
+        return {ship_id: cells[chosen[ship_id]] for ship_id, cells in choices.items()}
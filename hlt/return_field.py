@@ -0,0 +1,77 @@
+import numpy as np
+
+
+class ReturnField:
+    """
+    The way back from every cell of the map to a set of dropoffs.
+
+    For every cell (by cell index) it holds:
+    nearest, the index in dropoffs of the closest dropoff,
+    distance, the Manhattan distance to that dropoff, and
+    cost, the least halite spent on moves to get back to any of the dropoffs.
+    """
+
+    def __init__(self, game_map, dropoffs):
+        """
+        :param game_map: The map to build the field on
+        :param dropoffs: The positions ships return to (shipyard and dropoffs)
+        """
+        self.game_map = game_map
+        self.dropoffs = [game_map.normalize(position) for position in dropoffs]
+        self.key = tuple(position.index for position in self.dropoffs)
+        self.nearest, self.distance = self._distances()
+        self.update_costs()
+
+    def _distances(self):
+        game_map = self.game_map
+        x = np.tile(np.arange(game_map.width), game_map.height)
+        y = np.repeat(np.arange(game_map.height), game_map.width)
+        distances = np.empty((len(self.dropoffs), game_map.width * game_map.height), dtype=np.int32)
+        for row, dropoff in enumerate(self.dropoffs):
+            distance_x = np.abs(x - dropoff.x)
+            distance_y = np.abs(y - dropoff.y)
+            distances[row] = np.minimum(distance_x, game_map.width - distance_x) + \
+                np.minimum(distance_y, game_map.height - distance_y)
+        nearest = distances.argmin(axis=0)
+        return nearest, distances[nearest, np.arange(distances.shape[1])]
+
+    def update_costs(self):
+        """
+        Recomputes cost from the map's current move costs: multi-source
+        shortest paths from the dropoffs where leaving a cell costs its move
+        cost, with all cells relaxed at once until nothing improves.
+        """
+        game_map = self.game_map
+        move_cost = game_map.move_cost.reshape(game_map.height, game_map.width).astype(np.int64)
+        unreachable = np.iinfo(np.int64).max // 4
+        cost = np.full((game_map.height, game_map.width), unreachable, dtype=np.int64)
+        cost.reshape(-1)[list(self.key)] = 0
+        while True:
+            best_neighbor = np.minimum(
+                np.minimum(np.roll(cost, 1, axis=0), np.roll(cost, -1, axis=0)),
+                np.minimum(np.roll(cost, 1, axis=1), np.roll(cost, -1, axis=1)))
+            relaxed = np.minimum(cost, best_neighbor + move_cost)
+            if np.array_equal(relaxed, cost):
+                self.cost = cost.reshape(-1)
+                return
+            cost = relaxed
+
+    def closest(self, position):
+        """
+        :param position: The position to return from
+        :return: The distance to the closest dropoff and its position
+        """
+        index = self.game_map.cell_index(position)
+        return int(self.distance[index]), self.dropoffs[self.nearest[index]]
+
+    def distance_to(self, position):
+        """
+        :return: The Manhattan distance from a position to the closest dropoff
+        """
+        return int(self.distance[self.game_map.cell_index(position)])
+
+    def cost_from(self, position):
+        """
+        :return: The least halite spent on moves getting from a position back to a dropoff
+        """
+        return int(self.cost[self.game_map.cell_index(position)])
@@ -0,0 +1,128 @@
+import logging
+import time
+from contextlib import contextmanager
+
+from .logs import get_logger
+
+logger = get_logger(__name__)
+
+
+class TurnScheduler:
+    """
+    Keeps a turn within a wall-clock budget.
+
+    The bot runs its stages through the scheduler in priority order. Stages
+    that handle ships one by one stop once the time left drops below what
+    the later stages need, and the ships they did not get to go through a
+    cheap fallback instead. Stages with their own time limit ask for the
+    time that is left. How much of the budget every stage used is kept in
+    stages and logged at the end of the turn, and recorded as phases of
+    the turn's metrics when there are any.
+    """
+
+    def __init__(self, budget=1.5, metrics=None):
+        """
+        :param budget: Seconds a turn may take, measured from start_turn
+        :param metrics: Optional TurnMetrics to record the stages in
+        """
+        self.budget = budget
+        self.metrics = metrics
+        self.stages = {}
+        self._start = time.perf_counter()
+
+    def start_turn(self, start=None):
+        """
+        Starts the clock for a new turn.
+        :param start: When the turn started (time.perf_counter), defaults to now
+        """
+        self._start = time.perf_counter() if start is None else start
+        self.stages = {}
+
+    def elapsed(self):
+        """
+        :return: Seconds since the turn started
+        """
+        return time.perf_counter() - self._start
+
+    def remaining(self):
+        """
+        :return: Seconds left in the budget, can be negative
+        """
+        return self.budget - self.elapsed()
+
+    def time_limit(self, maximum, reserve=0.0):
+        """
+        :param maximum: The most a stage wants to spend
+        :param reserve: Seconds to keep for the stages after it
+        :return: The seconds a stage with its own time limit may spend
+        """
+        return max(0.0, min(maximum, self.remaining() - reserve))
+
+    def run(self, name, items, action, fallback, reserve=0.0):
+        """
+        Runs action on the items in order while there is time, and fallback on the rest.
+        :param name: The stage name to report under
+        :param items: The items to handle, e.g. ships
+        :param action: The full policy, called with one item
+        :param fallback: The cheap policy for items there is no time left for
+        :param reserve: Seconds to keep for the stages after this one
+        :return: nothing
+        """
+        start = time.perf_counter()
+        items = list(items)
+        done = 0
+        with self._phase(name, len(items)):
+            for item in items:
+                if self.remaining() <= reserve:
+                    break
+                action(item)
+                done += 1
+            for item in items[done:]:
+                fallback(item)
+        self._record(name, start, done, len(items) - done)
+
+    @contextmanager
+    def stage(self, name):
+        """
+        Times a stage that is not split by item.
+        """
+        start = time.perf_counter()
+        try:
+            with self._phase(name):
+                yield self
+        finally:
+            self._record(name, start)
+
+    def _phase(self, name, ships=0):
+        if self.metrics is None:
+            return _untimed()
+        return self.metrics.phase(name, ships)
+
+    def _record(self, name, start, done=None, fallback=None):
+        stats = {"time": time.perf_counter() - start}
+        if done is not None:
+            stats["done"] = done
+            stats["fallback"] = fallback
+            if fallback:
+                logger.warning("Out of time in {}, {} of {} took the fallback",
+                                name, fallback, done + fallback)
+        self.stages[name] = stats
+
+    def report(self):
+        """
+        Logs the budget use of the turn so far.
+        :return: Dict with the total time used, the budget and the stats per stage
+        """
+        used = self.elapsed()
+        report = {"used": used, "budget": self.budget, "stages": self.stages}
+        if used > self.budget:
+            logger.warning("Turn took {:.3f}s, over the {:.3f}s budget", used, self.budget)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Turn budget: {:.3f}s of {:.3f}s, {}", used, self.budget, ", ".join(
+                "{} {:.3f}s".format(name, stats["time"]) for name, stats in self.stages.items()))
+        return report
+
+
+@contextmanager
+def _untimed():
+    yield
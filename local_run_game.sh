@@ -0,0 +1,6 @@
+#!/bin/sh
+# Plays a game on the pure-Python engine in tools/engine.py, no halite binary needed
+export HALITE_LOG_LEVEL="${HALITE_LOG_LEVEL:-DEBUG}"
+export HALITE_LOG_MODE="${HALITE_LOG_MODE:-file}"
+
+python3 tools/engine.py --width 32 --height 32 "$@" "python3 MyBot.py" "python3 alternative_bot.py"
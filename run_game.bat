@@ -1 +1,3 @@
+set HALITE_LOG_LEVEL=DEBUG
+set HALITE_LOG_MODE=file
 halite.exe --replay-directory replays/ -vvv --width 32 --height 32 "python MyBot.py" "python MyBot.py"
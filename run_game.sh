@@ -4,6 +4,9 @@ echo > ./bot-1.log
 echo > ./bot-2.log
 echo > ./bot-3.log
 rm -f ./replays/*.log ./replays/*.hlt
+# Full logs for local games, see hlt/logs.py
+export HALITE_LOG_LEVEL="${HALITE_LOG_LEVEL:-DEBUG}"
+export HALITE_LOG_MODE="${HALITE_LOG_MODE:-file}"
 
 ./halite -v --replay-directory replays/ --turn-limit 500 -vvv --width 64 --height 64 "python3 MyBot.py" "python3 MyBot.py" 
 # "python3 MyBot.py" "python3 MyBot.py"
@@ -0,0 +1,776 @@
+"""
+A local Halite III engine in pure Python, for playing games without the halite binary.
+
+It generates a mirrored map, starts the bots as processes and speaks the
+engine's line protocol with them, so any bot that plays against ./halite
+plays against this engine unchanged. A turn follows the engine's rules:
+
+1. Commands: dropoffs are built, ships move if they can pay the move
+   cost of the cell they leave and a new ship is spawned on the shipyard.
+2. Ships that end up on the same cell are destroyed. Their cargo drops on
+   the cell, or goes to the owner of the shipyard or dropoff there.
+3. Ships on a shipyard or dropoff of their owner deposit their cargo.
+4. Ships that did not move mine the cell they are on. A ship with at
+   least INSPIRATION_SHIP_COUNT enemy ships within INSPIRATION_RADIUS at
+   the start of the turn is inspired and collects a bonus on top.
+
+The game ends after MAX_TURNS turns, or when at most one player is left.
+A player without ships who cannot pay for a new one is out. So is a bot
+that crashes, sends something the engine cannot parse or goes over its
+time limit. Commands that cannot be carried out are left out with a
+warning, like the engine does without strict errors. Ranks go by halite;
+players who were out rank below the others, the later out the better.
+
+Bots written as a subclass of hlt.bot.Bot can also play in the engine's
+process with --in-process, given as their scripts, which takes the pipes
+out of the turn times and lets a profiler see the engine and the bots.
+
+Usage: python tools/engine.py "python3 MyBot.py" "python3 alternative_bot.py" [--width 32] [--height 32]
+       [--seed 1] [--turn-limit 400] [--no-timeout] [--results-as-json] [--in-process]
+"""
+import argparse
+import importlib.util
+import json
+import logging
+import os
+import queue
+import random
+import shlex
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+DEFAULT_CONSTANTS = {
+    "CAPTURE_ENABLED": False,
+    "CAPTURE_RADIUS": 3,
+    "DEFAULT_MAP_HEIGHT": 48,
+    "DEFAULT_MAP_WIDTH": 48,
+    "DROPOFF_COST": 4000,
+    "DROPOFF_PENALTY_RATIO": 4,
+    "EXTRACT_RATIO": 4,
+    "FACTOR_EXP_1": 2.0,
+    "FACTOR_EXP_2": 2.0,
+    "INITIAL_ENERGY": 5000,
+    "INSPIRATION_ENABLED": True,
+    "INSPIRATION_RADIUS": 4,
+    "INSPIRATION_SHIP_COUNT": 2,
+    "INSPIRED_BONUS_MULTIPLIER": 2.0,
+    "INSPIRED_EXTRACT_RATIO": 4,
+    "INSPIRED_MOVE_COST_RATIO": 10,
+    "MAX_CELL_PRODUCTION": 1000,
+    "MAX_ENERGY": 1000,
+    "MAX_PLAYERS": 16,
+    "MAX_TURNS": 500,
+    "MAX_TURN_THRESHOLD": 64,
+    "MIN_CELL_PRODUCTION": 900,
+    "MIN_TURNS": 400,
+    "MIN_TURN_THRESHOLD": 32,
+    "MOVE_COST_RATIO": 10,
+    "NEW_ENTITY_ENERGY_COST": 1000,
+    "PERSISTENCE": 0.7,
+    "SHIPS_ABOVE_FOR_CAPTURE": 3,
+    "STRICT_ERRORS": False,
+}
+
+DIRECTIONS = {"n": (0, -1), "s": (0, 1), "e": (1, 0), "w": (-1, 0), "o": (0, 0)}
+
+# Seconds a bot has to get ready and to play a turn
+INIT_TIMEOUT = 30.0
+TURN_TIMEOUT = 2.0
+
+
+def game_constants(width, height, seed, turn_limit=None):
+    """
+    The constants sent to the bots. Like the engine, MAX_TURNS grows from
+    MIN_TURNS on the smallest maps to MAX_TURNS on the largest.
+    :return: Dict of the constants
+    """
+    constants = dict(DEFAULT_CONSTANTS, DEFAULT_MAP_WIDTH=width, DEFAULT_MAP_HEIGHT=height, game_seed=seed)
+    if turn_limit is None:
+        size = max(width, height)
+        low, high = constants["MIN_TURN_THRESHOLD"], constants["MAX_TURN_THRESHOLD"]
+        fraction = min(1.0, max(0.0, (size - low) / (high - low)))
+        turn_limit = int(round(constants["MIN_TURNS"] + fraction * (constants["MAX_TURNS"] - constants["MIN_TURNS"])))
+    constants["MAX_TURNS"] = turn_limit
+    return constants
+
+
+def _value_noise(width, height, persistence, rng):
+    """
+    Fractal value noise: random grids of growing resolution, smoothly
+    interpolated to the tile size and added with falling weights.
+    :return: (height, width) array scaled to 0..1
+    """
+    noise = np.zeros((height, width))
+    amplitude = 1.0
+    resolution = 2
+    while resolution <= 2 * max(width, height):
+        grid = rng.random_sample((resolution + 1, resolution + 1))
+        ys = np.linspace(0, resolution, height, endpoint=False)
+        xs = np.linspace(0, resolution, width, endpoint=False)
+        y0, x0 = ys.astype(int), xs.astype(int)
+        fy, fx = (ys - y0)[:, None], (xs - x0)[None, :]
+        # Smoothstep the weights so the grid does not show
+        fy, fx = fy * fy * (3 - 2 * fy), fx * fx * (3 - 2 * fx)
+        top = grid[y0][:, x0] * (1 - fx) + grid[y0][:, x0 + 1] * fx
+        bottom = grid[y0 + 1][:, x0] * (1 - fx) + grid[y0 + 1][:, x0 + 1] * fx
+        noise += amplitude * (top * (1 - fy) + bottom * fy)
+        amplitude *= persistence
+        resolution *= 2
+    noise -= noise.min()
+    return noise / (noise.max() or 1.0)
+
+
+def generate_map(width, height, players, constants, rng):
+    """
+    Generates a map the way the engine does: one tile of fractal noise per
+    player, mirrored so every player starts with the same surroundings.
+    :param rng: A numpy RandomState
+    :return: Tuple of the halite per cell, a flat list indexed by y * width + x, and the shipyard positions
+    """
+    columns = 2 if players > 1 else 1
+    rows = 2 if players > 2 else 1
+    if width % columns or height % rows:
+        raise ValueError("A {}x{} map cannot be split between {} players".format(width, height, players))
+    tile_width, tile_height = width // columns, height // rows
+    noise = _value_noise(tile_width, tile_height, constants["PERSISTENCE"], rng) ** constants["FACTOR_EXP_1"]
+    production = rng.randint(constants["MIN_CELL_PRODUCTION"], constants["MAX_CELL_PRODUCTION"] + 1)
+    tile = (noise * production).astype(np.int64)
+    halite = np.hstack([tile, tile[:, ::-1]]) if columns == 2 else tile
+    halite = np.vstack([halite, halite[::-1]]) if rows == 2 else halite
+
+    x, y = tile_width // 2, tile_height // 2
+    shipyards = [(x, y), (width - 1 - x, y), (x, height - 1 - y), (width - 1 - x, height - 1 - y)][:players]
+    for shipyard_x, shipyard_y in shipyards:
+        halite[shipyard_y, shipyard_x] = 0
+    return halite.reshape(-1).tolist(), shipyards
+
+
+class Ship:
+    __slots__ = ("owner", "id", "x", "y", "halite")
+
+    def __init__(self, owner, ship_id, x, y, halite=0):
+        self.owner = owner
+        self.id = ship_id
+        self.x = x
+        self.y = y
+        self.halite = halite
+
+
+class PlayerState:
+    """
+    A player's halite, structures and ships, and how the player left the game if it did.
+    """
+
+    def __init__(self, player_id, shipyard, halite):
+        self.id = player_id
+        self.shipyard = shipyard
+        self.halite = halite
+        # Dropoff id to (x, y)
+        self.dropoffs = {}
+        # Ship id to Ship
+        self.ships = {}
+        self.out_turn = None
+        self.error = None
+        self.mined = 0
+        self.deposited = 0
+        self.collisions = 0
+        self.warnings = 0
+
+    @property
+    def alive(self):
+        return self.out_turn is None
+
+
+class Simulation:
+    """
+    The rules of the game, without any bots: holds the state, writes what
+    the engine sends the bots and applies the commands they send back.
+    """
+
+    def __init__(self, width, height, players, seed, turn_limit=None, constants=None):
+        """
+        :param width: The map width
+        :param height: The map height
+        :param players: The number of players, 1, 2 or 4
+        :param seed: The map seed
+        :param turn_limit: The number of turns, defaults to what the engine plays on the map size
+        :param constants: The constants to play with, defaults to game_constants
+        """
+        self.width = width
+        self.height = height
+        self.constants = constants or game_constants(width, height, seed, turn_limit)
+        self.max_turns = self.constants["MAX_TURNS"]
+        self.halite, shipyards = generate_map(width, height, players, self.constants, np.random.RandomState(seed))
+        self.players = [PlayerState(player, shipyard, self.constants["INITIAL_ENERGY"])
+                        for player, shipyard in enumerate(shipyards)]
+        # Cell index to (owner, structure id), the shipyard having its player's id
+        self.structures = {self.index(*player.shipyard): (player.id, player.id) for player in self.players}
+        self.turn = 0
+        self._next_ship_id = 0
+        self._next_dropoff_id = players
+        self._changed = set()
+
+    def index(self, x, y):
+        return (y % self.height) * self.width + x % self.width
+
+    def ships(self):
+        for player in self.players:
+            yield from player.ships.values()
+
+    @property
+    def finished(self):
+        alive = sum(player.alive for player in self.players)
+        return self.turn >= self.max_turns or alive == 0 or (len(self.players) > 1 and alive == 1)
+
+    def init_lines(self, player_id):
+        """
+        :return: The lines the engine sends a bot before the game starts
+        """
+        lines = [json.dumps(self.constants), "{} {}".format(len(self.players), player_id)]
+        lines += ["{} {} {}".format(player.id, *player.shipyard) for player in self.players]
+        lines.append("{} {}".format(self.width, self.height))
+        for y in range(self.height):
+            lines.append(" ".join(map(str, self.halite[y * self.width:(y + 1) * self.width])))
+        return lines
+
+    def frame_lines(self):
+        """
+        :return: The lines the engine sends every bot at the start of the next turn
+        """
+        lines = [str(self.turn + 1)]
+        for player in self.players:
+            lines.append("{} {} {} {}".format(player.id, len(player.ships), len(player.dropoffs), player.halite))
+            lines += ["{} {} {} {}".format(ship.id, ship.x, ship.y, ship.halite) for ship in player.ships.values()]
+            lines += ["{} {} {}".format(dropoff_id, x, y) for dropoff_id, (x, y) in player.dropoffs.items()]
+        lines.append(str(len(self._changed)))
+        lines += ["{} {} {}".format(index % self.width, index // self.width, self.halite[index])
+                  for index in sorted(self._changed)]
+        self._changed = set()
+        return lines
+
+    def parse_commands(self, line):
+        """
+        :param line: A line of commands from a bot
+        :return: List of (command, ship id or None, direction or None)
+        :raises ValueError: When the line is not made of commands
+        """
+        tokens = line.split()
+        commands = []
+        position = 0
+        while position < len(tokens):
+            command = tokens[position]
+            if command == "g":
+                commands.append(("g", None, None))
+                position += 1
+            elif command == "c" and position + 1 < len(tokens):
+                commands.append(("c", int(tokens[position + 1]), None))
+                position += 2
+            elif command == "m" and position + 2 < len(tokens) and tokens[position + 2] in DIRECTIONS:
+                commands.append(("m", int(tokens[position + 1]), tokens[position + 2]))
+                position += 3
+            else:
+                raise ValueError("Cannot parse command {!r} in {!r}".format(" ".join(tokens[position:position + 3]),
+                                                                            line))
+        return commands
+
+    def eliminate(self, player_id, error=None):
+        """
+        Takes a player out of the game, e.g. for crashing. Its ships are removed.
+        """
+        player = self.players[player_id]
+        if not player.alive:
+            return
+        player.out_turn = self.turn
+        player.error = error
+        player.ships = {}
+        if error:
+            logging.warning("Player {} is out on turn {}: {}".format(player_id, self.turn, error))
+
+    def _warn(self, player, message):
+        player.warnings += 1
+        logging.info("Turn {} player {}: {}".format(self.turn, player.id, message))
+
+    def _inspired(self):
+        """
+        :return: The ids of the ships inspired by the enemy ships around them
+        """
+        if not self.constants["INSPIRATION_ENABLED"]:
+            return set()
+        ships = list(self.ships())
+        if not ships:
+            return set()
+        xs = np.array([ship.x for ship in ships])
+        ys = np.array([ship.y for ship in ships])
+        owners = np.array([ship.owner for ship in ships])
+        dx = np.abs(xs[:, None] - xs[None, :])
+        dy = np.abs(ys[:, None] - ys[None, :])
+        distance = np.minimum(dx, self.width - dx) + np.minimum(dy, self.height - dy)
+        enemies = (distance <= self.constants["INSPIRATION_RADIUS"]) & (owners[:, None] != owners[None, :])
+        inspired = enemies.sum(axis=1) >= self.constants["INSPIRATION_SHIP_COUNT"]
+        return {ship.id for ship, flag in zip(ships, inspired) if flag}
+
+    def step(self, commands):
+        """
+        Plays a turn.
+        :param commands: Dict of player id to the parsed commands of that player
+        :return: nothing
+        """
+        self.turn += 1
+        constants = self.constants
+        inspired = self._inspired()
+        moved = set()
+        spawned = []
+
+        for player in self.players:
+            if not player.alive:
+                continue
+            commanded = set()
+            spawn = False
+            for command, ship_id, direction in commands.get(player.id, ()):
+                if command == "g":
+                    spawn = True
+                    continue
+                ship = player.ships.get(ship_id)
+                if ship is None:
+                    self._warn(player, "no ship {} to command".format(ship_id))
+                    continue
+                if ship_id in commanded:
+                    self._warn(player, "ship {} got more than one command".format(ship_id))
+                    continue
+                commanded.add(ship_id)
+                index = self.index(ship.x, ship.y)
+                if command == "c":
+                    cost = constants["DROPOFF_COST"] - ship.halite - self.halite[index]
+                    if index in self.structures:
+                        self._warn(player, "ship {} cannot build on a structure".format(ship_id))
+                    elif player.halite < cost:
+                        self._warn(player, "not enough halite for a dropoff")
+                    else:
+                        player.halite -= cost
+                        dropoff_id = self._next_dropoff_id
+                        self._next_dropoff_id += 1
+                        player.dropoffs[dropoff_id] = (ship.x, ship.y)
+                        self.structures[index] = (player.id, dropoff_id)
+                        if self.halite[index]:
+                            self.halite[index] = 0
+                            self._changed.add(index)
+                        del player.ships[ship_id]
+                elif direction != "o":
+                    ratio = constants["INSPIRED_MOVE_COST_RATIO" if ship_id in inspired else "MOVE_COST_RATIO"]
+                    cost = self.halite[index] // ratio
+                    if ship.halite < cost:
+                        self._warn(player, "ship {} cannot pay {} to move".format(ship_id, cost))
+                        continue
+                    ship.halite -= cost
+                    dx, dy = DIRECTIONS[direction]
+                    ship.x = (ship.x + dx) % self.width
+                    ship.y = (ship.y + dy) % self.height
+                    moved.add(ship_id)
+            if spawn:
+                if player.halite < constants["NEW_ENTITY_ENERGY_COST"]:
+                    self._warn(player, "not enough halite to spawn")
+                else:
+                    player.halite -= constants["NEW_ENTITY_ENERGY_COST"]
+                    ship = Ship(player.id, self._next_ship_id, *player.shipyard)
+                    self._next_ship_id += 1
+                    player.ships[ship.id] = ship
+                    spawned.append(ship.id)
+
+        self._collide()
+        self._deposit()
+        self._mine(inspired, moved.union(spawned))
+
+        for player in self.players:
+            if player.alive and not player.ships and player.halite < constants["NEW_ENTITY_ENERGY_COST"]:
+                self.eliminate(player.id)
+
+    def _collide(self):
+        cells = {}
+        for ship in self.ships():
+            cells.setdefault(self.index(ship.x, ship.y), []).append(ship)
+        for index, ships in cells.items():
+            if len(ships) < 2:
+                continue
+            cargo = 0
+            for ship in ships:
+                cargo += ship.halite
+                player = self.players[ship.owner]
+                player.collisions += 1
+                del player.ships[ship.id]
+            if index in self.structures:
+                self.players[self.structures[index][0]].halite += cargo
+            elif cargo:
+                self.halite[index] += cargo
+                self._changed.add(index)
+
+    def _deposit(self):
+        for ship in self.ships():
+            structure = self.structures.get(self.index(ship.x, ship.y))
+            if structure is not None and structure[0] == ship.owner and ship.halite:
+                player = self.players[ship.owner]
+                player.halite += ship.halite
+                player.deposited += ship.halite
+                ship.halite = 0
+
+    def _mine(self, inspired, moved):
+        constants = self.constants
+        capacity = constants["MAX_ENERGY"]
+        for ship in self.ships():
+            if ship.id in moved:
+                continue
+            index = self.index(ship.x, ship.y)
+            if not self.halite[index] or ship.halite >= capacity:
+                continue
+            ratio = constants["INSPIRED_EXTRACT_RATIO" if ship.id in inspired else "EXTRACT_RATIO"]
+            extracted = min(-(-self.halite[index] // ratio), capacity - ship.halite)
+            bonus = 0
+            if ship.id in inspired:
+                bonus = min(int(extracted * constants["INSPIRED_BONUS_MULTIPLIER"]),
+                            capacity - ship.halite - extracted)
+            self.halite[index] -= extracted
+            self._changed.add(index)
+            ship.halite += extracted + bonus
+            self.players[ship.owner].mined += extracted + bonus
+
+    def results(self):
+        """
+        :return: Dict of player id to a dict with its rank, halite and game stats
+        """
+        order = sorted(self.players, key=lambda player: (
+            player.alive, player.out_turn if not player.alive else 0, player.halite, -player.id), reverse=True)
+        return {player.id: {
+            "rank": rank + 1,
+            "halite": player.halite,
+            "ships": len(player.ships),
+            "dropoffs": len(player.dropoffs),
+            "mined": player.mined,
+            "deposited": player.deposited,
+            "collisions": player.collisions,
+            "warnings": player.warnings,
+            "out_turn": player.out_turn,
+            "error": player.error,
+        } for rank, player in enumerate(order)}
+
+
+class BotProcess:
+    """
+    A bot running as a process, talking over its stdin and stdout. Its
+    output is read on a thread so the engine can wait with a time limit,
+    and every line is stamped with when it came in.
+    """
+
+    def __init__(self, command, cwd=None):
+        """
+        :param command: The command line that starts the bot, e.g. "python3 MyBot.py"
+        :param cwd: The directory to start the bot in
+        """
+        self.command = command
+        self.stderr = tempfile.TemporaryFile()
+        self.process = subprocess.Popen(shlex.split(command), stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                        stderr=self.stderr, cwd=cwd)
+        self.lines = queue.Queue()
+        # Seconds every turn took, from sending the frame to the commands coming in
+        self.turn_times = []
+        self._reader = threading.Thread(target=self._read, daemon=True)
+        self._reader.start()
+
+    def _read(self):
+        for line in iter(self.process.stdout.readline, b""):
+            self.lines.put((time.perf_counter(), line.decode().rstrip("\r\n")))
+        self.lines.put((time.perf_counter(), None))
+
+    def send(self, lines):
+        """
+        :return: Whether the bot is still there to send to
+        """
+        try:
+            self.process.stdin.write(("\n".join(lines) + "\n").encode())
+            self.process.stdin.flush()
+            return True
+        except (BrokenPipeError, OSError):
+            return False
+
+    def receive(self, timeout):
+        """
+        :param timeout: Seconds to wait, None to wait as long as it takes
+        :return: Tuple of when the line came in (time.perf_counter) and the next line from the bot
+        :raises RuntimeError: When the bot exited or took too long
+        """
+        try:
+            received, line = self.lines.get(timeout=timeout)
+        except queue.Empty:
+            raise RuntimeError("timed out after {:.2f}s".format(timeout))
+        if line is None:
+            raise RuntimeError("exited with code {}: {}".format(self.process.wait(), self.error_output()))
+        return received, line
+
+    def error_output(self, limit=500):
+        """
+        :return: The end of what the bot wrote to stderr
+        """
+        self.stderr.seek(0)
+        return self.stderr.read().decode(errors="replace")[-limit:].strip()
+
+    def stop(self, grace=1.0):
+        try:
+            self.process.stdin.close()
+        except OSError:
+            pass
+        try:
+            self.process.wait(grace)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+        self.stderr.close()
+
+
+class _Feed:
+    """
+    The stream an in-process bot reads from, holding what the engine sent it.
+    """
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(data)
+
+    def read1(self, size=-1):
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def load_script(path):
+    """
+    Imports a bot's script as a module, once. The script's directory goes
+    first on the path, so the hlt package of the first script loaded is the
+    one every bot in the process uses.
+    :param path: The script
+    :return: The module
+    """
+    path = os.path.abspath(path)
+    sys.path.insert(0, os.path.dirname(path))
+    module_name = "_bot_{}".format(abs(hash(path)))
+    module = sys.modules.get(module_name)
+    if module is None:
+        module_spec = importlib.util.spec_from_file_location(module_name, path)
+        module = importlib.util.module_from_spec(module_spec)
+        module_spec.loader.exec_module(module)
+        sys.modules[module_name] = module
+    return module
+
+
+def script_class(module, base, class_name=None):
+    """
+    :param module: A module from load_script
+    :param base: The class to look for a subclass of
+    :param class_name: The class to take, needed when the module defines several
+    :return: The class
+    :raises ValueError: When the module does not define exactly one subclass and no name is given
+    """
+    if class_name:
+        return getattr(module, class_name)
+    classes = [value for value in vars(module).values()
+               if isinstance(value, type) and issubclass(value, base) and value is not base
+               and value.__module__ == module.__name__]
+    if len(classes) != 1:
+        raise ValueError("{} defines {} {} classes, name the one to use".format(
+            module.__file__, len(classes), base.__name__))
+    return classes[0]
+
+
+def load_bot(spec):
+    """
+    Creates a bot from its script, which has to define a subclass of hlt.bot.Bot.
+    :param spec: The script, with the class after a colon when it has several, e.g. "MyBot.py:ChaosBot"
+    :return: The bot
+    """
+    path, _, class_name = spec.partition(":")
+    module = load_script(path)
+    from hlt.bot import Bot
+
+    return script_class(module, Bot, class_name)()
+
+
+class InProcessBot:
+    """
+    A bot playing in the engine's process, with the same interface as
+    BotProcess. Sending a frame plays the bot's turn right away on a Game
+    that reads from memory, so there is no process and no pipe in between.
+
+    A bot cannot be stopped in the middle of a turn, so the time limits are
+    not enforced; the turn times are still recorded. Everything global in
+    hlt, the constants and logging, is shared by the bots in the process.
+    """
+
+    def __init__(self, spec):
+        """
+        :param spec: The bot's script, see load_bot
+        """
+        self.command = spec
+        self.bot = load_bot(spec)
+        from hlt.common import InputReader
+
+        self.game = None
+        self.lines = queue.Queue()
+        self.turn_times = []
+        self._feed = _Feed()
+        self._reader = InputReader(self._feed)
+        self._error = None
+
+    def _output(self, line):
+        self.lines.put((time.perf_counter(), line))
+
+    def send(self, lines):
+        """
+        Plays the bot's setup or its turn on the lines sent.
+        :return: Whether the bot is still there to send to
+        """
+        if self._error is not None:
+            return False
+        from hlt.networking import Game
+
+        self._feed.write(("\n".join(lines) + "\n").encode())
+        try:
+            if self.game is None:
+                self.game = Game(self._reader, self._output)
+                self.bot.on_start(self.game)
+                self.game.ready(self.bot.name)
+            else:
+                self.game.update_frame()
+                self.bot.end_turn(self.game, self.bot.on_turn(self.game))
+        except (Exception, SystemExit) as error:
+            logging.exception("%s crashed", self.command)
+            self._error = "{}: {}".format(type(error).__name__, error)
+            return False
+        return True
+
+    def receive(self, timeout):
+        """
+        :param timeout: Not enforced, see the class
+        :return: Tuple of when the line came in (time.perf_counter) and the next line from the bot
+        :raises RuntimeError: When the bot crashed
+        """
+        try:
+            return self.lines.get_nowait()
+        except queue.Empty:
+            raise RuntimeError("crashed: {}".format(self._error or "sent nothing"))
+
+    def stop(self, grace=None):
+        if self.bot is not None and self.game is not None:
+            try:
+                self.bot.on_end(self.game)
+            except Exception:
+                logging.exception("%s crashed", self.command)
+        self.bot = None
+        self.game = None
+
+
+def play(commands, width=32, height=32, seed=None, turn_limit=None, timeouts=True, cwd=None, in_process=False):
+    """
+    Plays a game between bots.
+    :param commands: The command lines that start the bots, 1, 2 or 4 of them, or their scripts to play in process
+    :param width: The map width
+    :param height: The map height
+    :param seed: The map seed, random by default
+    :param turn_limit: The number of turns, defaults to what the engine plays on the map size
+    :param timeouts: Whether to hold the bots to the engine's time limits
+    :param cwd: The directory to start the bots in
+    :param in_process: Whether to play the bots in this process, see InProcessBot
+    :return: Dict with the game settings and the results per player, see Simulation.results,
+             with the bots' names and the seconds every turn took them
+    """
+    seed = random.randrange(1 << 31) if seed is None else seed
+    simulation = Simulation(width, height, len(commands), seed, turn_limit)
+    names = {}
+    if in_process:
+        # The bots write their files to the working directory
+        previous_cwd = os.getcwd()
+        os.chdir(cwd or previous_cwd)
+        bots = [InProcessBot(command) for command in commands]
+    else:
+        bots = [BotProcess(command, cwd) for command in commands]
+    try:
+        for player_id, bot in enumerate(bots):
+            bot.send(simulation.init_lines(player_id))
+        for player_id, bot in enumerate(bots):
+            try:
+                names[player_id] = bot.receive(INIT_TIMEOUT if timeouts else None)[1]
+            except RuntimeError as error:
+                simulation.eliminate(player_id, "setup: {}".format(error))
+
+        while not simulation.finished:
+            frame = simulation.frame_lines()
+            started = {}
+            for player_id, bot in enumerate(bots):
+                if simulation.players[player_id].alive:
+                    started[player_id] = time.perf_counter()
+                    bot.send(frame)
+            deadline = time.perf_counter() + TURN_TIMEOUT
+            turn_commands = {}
+            for player_id in started:
+                bot = bots[player_id]
+                try:
+                    received, line = bot.receive(max(0.0, deadline - time.perf_counter()) if timeouts else None)
+                    bot.turn_times.append(received - started[player_id])
+                    turn_commands[player_id] = simulation.parse_commands(line)
+                except (RuntimeError, ValueError) as error:
+                    simulation.eliminate(player_id, str(error))
+            simulation.step(turn_commands)
+    finally:
+        for bot in bots:
+            bot.stop()
+        if in_process:
+            os.chdir(previous_cwd)
+
+    results = simulation.results()
+    for player_id, bot in enumerate(bots):
+        results[player_id].update(name=names.get(player_id), command=bot.command,
+                                  bot_time=sum(bot.turn_times), turn_times=bot.turn_times)
+    return {
+        "map_width": width,
+        "map_height": height,
+        "map_seed": seed,
+        "turns": simulation.turn,
+        "players": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("bots", nargs="+", help="The command lines that start the bots, 1, 2 or 4 of them")
+    parser.add_argument("--in-process", action="store_true",
+                        help="Play the bots in this process, given as their scripts, e.g. MyBot.py:ChaosBot")
+    parser.add_argument("--width", type=int, default=32)
+    parser.add_argument("--height", type=int, default=32)
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--turn-limit", type=int)
+    parser.add_argument("--no-timeout", action="store_true", help="Let the bots take as long as they want")
+    parser.add_argument("--results-as-json", action="store_true")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Log the commands that are left out")
+    args = parser.parse_args()
+    if len(args.bots) not in (1, 2, 4):
+        parser.error("Play with 1, 2 or 4 bots")
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING, stream=sys.stderr)
+
+    result = play(args.bots, args.width, args.height, args.seed, args.turn_limit, not args.no_timeout, os.getcwd(),
+                  args.in_process)
+    if args.results_as_json:
+        print(json.dumps(result))
+        return
+    print("{map_width}x{map_height} map, seed {map_seed}, {turns} turns".format(**result))
+    for player_id, player in sorted(result["players"].items(), key=lambda item: item[1]["rank"]):
+        print("#{rank} player {id} {name}: {halite} halite, {ships} ships, {dropoffs} dropoffs, "
+              "{collisions} collisions, {bot_time:.2f}s{out}".format(
+                  id=player_id, out=" (out on turn {}: {})".format(player["out_turn"], player["error"])
+                  if player["out_turn"] is not None else "", **player))
+
+
+if __name__ == "__main__":
+    main()
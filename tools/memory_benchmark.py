@@ -0,0 +1,126 @@
+"""
+Memory benchmark for the hlt game model.
+
+Generates a game's worth of engine input, plays it through hlt.Game from
+an in-memory stream and uses tracemalloc to report how much memory the
+model holds after setup and what each turn allocates.
+
+Usage: python tools/memory_benchmark.py [--sizes 32 64] [--turns 200] [--players 4] [--ships 60]
+"""
+import argparse
+import io
+import json
+import logging
+import os
+import random
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from hlt import Game  # noqa: E402
+from hlt.common import InputReader  # noqa: E402
+
+CONSTANTS = {
+    "NEW_ENTITY_ENERGY_COST": 1000, "DROPOFF_COST": 4000, "MAX_ENERGY": 1000, "MAX_TURNS": 400,
+    "EXTRACT_RATIO": 4, "MOVE_COST_RATIO": 10, "INSPIRATION_ENABLED": True, "INSPIRATION_RADIUS": 4,
+    "INSPIRATION_SHIP_COUNT": 2, "INSPIRED_EXTRACT_RATIO": 4, "INSPIRED_BONUS_MULTIPLIER": 2.0,
+    "INSPIRED_MOVE_COST_RATIO": 10,
+}
+MOVES = [(0, -1), (0, 1), (1, 0), (-1, 0), (0, 0)]
+
+
+def generate_input(size, players, turns, ships, seed=0):
+    """
+    Builds the engine input for a game where every player's fleet grows to
+    a number of ships that then wander randomly, mining where they stop.
+    :return: The bytes the engine would send, the init block followed by all frames
+    """
+    rng = random.Random(seed)
+    halite = [[rng.randrange(0, 1000) for _ in range(size)] for _ in range(size)]
+    shipyards = [(size // 4, size // 4), (3 * size // 4, 3 * size // 4),
+                 (3 * size // 4, size // 4), (size // 4, 3 * size // 4)][:players]
+    lines = [json.dumps(CONSTANTS), "{} 0".format(players)]
+    lines += ["{} {} {}".format(player, x, y) for player, (x, y) in enumerate(shipyards)]
+    lines.append("{} {}".format(size, size))
+    lines += [" ".join(map(str, row)) for row in halite]
+
+    fleets = [{} for _ in range(players)]
+    next_id = 0
+    for turn in range(1, turns + 1):
+        updates = set()
+        for player, fleet in enumerate(fleets):
+            for ship in fleet.values():
+                dx, dy = rng.choice(MOVES)
+                ship[0] = (ship[0] + dx) % size
+                ship[1] = (ship[1] + dy) % size
+                if dx == dy == 0:
+                    mined = halite[ship[1]][ship[0]] // 4
+                    halite[ship[1]][ship[0]] -= mined
+                    ship[2] = min(1000, ship[2] + mined)
+                    updates.add((ship[0], ship[1]))
+            if len(fleet) < ships:
+                fleet[next_id] = [shipyards[player][0], shipyards[player][1], 0]
+                next_id += 1
+        lines.append(str(turn))
+        for player, fleet in enumerate(fleets):
+            lines.append("{} {} 0 5000".format(player, len(fleet)))
+            lines += ["{} {} {} {}".format(ship_id, *ship) for ship_id, ship in fleet.items()]
+        lines.append(str(len(updates)))
+        lines += ["{} {} {}".format(x, y, halite[y][x]) for x, y in updates]
+    return ("\n".join(lines) + "\n").encode()
+
+
+def measure(size, players, turns, ships):
+    """
+    Plays a generated game and measures it.
+    :return: Dict with the model's memory after setup and the mean allocations per turn
+    """
+    data = generate_input(size, players, turns, ships)
+    reader = InputReader(io.BufferedReader(io.BytesIO(data)))
+    tracemalloc.start()
+    game = Game(reader)
+    model_bytes = tracemalloc.get_traced_memory()[0]
+    model_blocks = sum(stat.count for stat in tracemalloc.take_snapshot().statistics("filename"))
+
+    peak_bytes = 0
+    before = tracemalloc.take_snapshot()
+    for _ in range(turns):
+        start_bytes = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        game.update_frame()
+        peak_bytes += tracemalloc.get_traced_memory()[1] - start_bytes
+    after = tracemalloc.take_snapshot()
+    kept_blocks = sum(stat.count_diff for stat in after.compare_to(before, "filename"))
+    resident_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return {
+        "size": "{0}x{0}".format(size),
+        "model_kib": model_bytes / 1024,
+        "model_blocks": model_blocks,
+        "resident_kib": resident_bytes / 1024,
+        "turn_peak_kib": peak_bytes / turns / 1024,
+        "turn_kept_blocks": kept_blocks / turns,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[32, 64])
+    parser.add_argument("--turns", type=int, default=200)
+    parser.add_argument("--players", type=int, default=4, choices=[2, 4])
+    parser.add_argument("--ships", type=int, default=60, help="Ships per player")
+    args = parser.parse_args()
+    # Keep Game from setting up its log file
+    logging.basicConfig(level=logging.WARNING)
+
+    print("{:>6} {:>10} {:>12} {:>13} {:>14} {:>17}".format(
+        "map", "model KiB", "model blocks", "resident KiB", "turn peak KiB", "turn kept blocks"))
+    for size in args.sizes:
+        result = measure(size, args.players, args.turns, args.ships)
+        print("{size:>6} {model_kib:>10.0f} {model_blocks:>12} {resident_kib:>13.0f} "
+              "{turn_peak_kib:>14.1f} {turn_kept_blocks:>17.1f}".format(**result))
+
+
+if __name__ == "__main__":
+    main()
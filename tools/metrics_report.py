@@ -0,0 +1,36 @@
+"""
+Per-phase percentiles of the metrics a bot wrote during a game.
+
+A bot writes its metrics when started with --metrics <file> or with
+HALITE_METRICS=<file> set, "{}" in the name being replaced by its player id.
+
+Usage: python tools/metrics_report.py bot-0.metrics.jsonl [--key wall] [--points 50 99]
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from hlt.metrics import load, percentiles  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("path", help="A metrics file written by hlt.metrics.TurnMetrics")
+    parser.add_argument("--key", default="wall", choices=["wall", "cpu", "calls", "ships"])
+    parser.add_argument("--points", type=int, nargs="+", default=[50, 99])
+    args = parser.parse_args()
+
+    turns = load(args.path)
+    result = percentiles(turns, args.key, args.points)
+    scale = 1000 if args.key in ("wall", "cpu") else 1
+    unit = " (ms)" if scale == 1000 else ""
+    print("{} turns, {}{}".format(len(turns), args.key, unit))
+    print("{:<20}".format("phase") + "".join("{:>10}".format("p{}".format(point)) for point in args.points))
+    for name, values in sorted(result.items(), key=lambda item: -item[1][args.points[-1]]):
+        print("{:<20}".format(name) + "".join("{:>10.2f}".format(values[point] * scale) for point in args.points))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Replays a recorded game against bots to benchmark their turns.
+
+A bot records a game when started with --record <file> or with
+HALITE_RECORD=<file> set, "{}" in the name being replaced by its player id.
+This tool feeds the recorded engine input to every bot given, each in its
+own process with the random generators seeded, so no engine runs and two
+versions of a bot see exactly the same frames. It reports the time every
+turn took and which turns gave the recorded commands; a bot that is
+deterministic gives the same commands in every run.
+
+Usage: python tools/replay.py bot-0.hlr [--bots MyBot.py ../old/MyBot.py] [--runs 3] [--seed 0] [--times times.json]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from hlt.recording import RECORD_VARIABLE, Recording  # noqa: E402
+
+# Runs a bot with the random generators seeded and its own hlt package first on the path
+BOOTSTRAP = """
+import os, random, runpy, sys
+bot, seed = sys.argv[1], int(sys.argv[2])
+random.seed(seed)
+try:
+    import numpy
+    numpy.random.seed(seed)
+except ImportError:
+    pass
+sys.argv = [bot]
+sys.path.insert(0, os.path.dirname(bot))
+runpy.run_path(bot, run_name="__main__")
+"""
+
+
+def replay(recording, bot, seed, workdir):
+    """
+    Plays a recording through a bot.
+    :param recording: The Recording
+    :param bot: Path to the bot's script
+    :param seed: The seed for the random generators
+    :param workdir: Where the bot writes its logs and metrics
+    :return: Tuple of the lines the bot sent and the seconds each took, the first being its setup
+    """
+    env = dict(os.environ)
+    env.pop(RECORD_VARIABLE, None)
+    env["PYTHONHASHSEED"] = str(seed)
+    env.setdefault("HALITE_LOG_MODE", "off")
+    with open(os.path.join(workdir, "replay-stderr.log"), "wb") as stderr:
+        process = subprocess.Popen(
+            [sys.executable, "-c", BOOTSTRAP, os.path.abspath(bot), str(seed)],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=stderr, cwd=workdir, env=env)
+
+        def feed():
+            try:
+                process.stdin.write(recording.input)
+                process.stdin.close()
+            except BrokenPipeError:
+                pass
+
+        feeder = threading.Thread(target=feed, daemon=True)
+        lines = []
+        times = []
+        last = time.perf_counter()
+        feeder.start()
+        for line in iter(process.stdout.readline, b""):
+            now = time.perf_counter()
+            lines.append(line.rstrip(b"\r\n").decode())
+            times.append(now - last)
+            last = now
+        process.wait()
+        feeder.join()
+    return lines, times
+
+
+def summarize(recording, lines, times):
+    """
+    :return: Dict with the turn times in ms and how many turns match the recording
+    """
+    turns = sorted(times[1:])
+    matching = sum(1 for sent, recorded in zip(lines[1:], recording.turns) if sent == recorded)
+
+    def point(percent):
+        return turns[min(len(turns) - 1, max(0, -(-percent * len(turns) // 100) - 1))] * 1000
+
+    return {
+        "turns": len(turns),
+        "matching": matching,
+        "setup_ms": times[0] * 1000 if times else 0.0,
+        "mean_ms": sum(turns) / len(turns) * 1000 if turns else 0.0,
+        "p50_ms": point(50) if turns else 0.0,
+        "p99_ms": point(99) if turns else 0.0,
+        "max_ms": turns[-1] * 1000 if turns else 0.0,
+        "total_s": sum(turns),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("recording", help="A file recorded with --record")
+    parser.add_argument("--bots", nargs="+", default=["MyBot.py"], help="The bot scripts to replay")
+    parser.add_argument("--runs", type=int, default=1, help="Replays per bot")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workdir", help="Where the bots write their files, defaults to a temporary directory")
+    parser.add_argument("--times", help="Write the turn times of every run to this JSON file")
+    args = parser.parse_args()
+
+    recording = Recording.load(args.recording)
+    workdir = args.workdir or tempfile.mkdtemp(prefix="replay-")
+    print("{} recorded turns, bots write to {}".format(len(recording.turns), workdir))
+    print("{:<30} {:>3} {:>6} {:>9} {:>9} {:>9} {:>9} {:>9} {:>9} {:>8}".format(
+        "bot", "run", "turns", "matching", "setup ms", "mean ms", "p50 ms", "p99 ms", "max ms", "total s"))
+    all_times = {}
+    for bot in args.bots:
+        first_lines = None
+        deterministic = True
+        for run in range(args.runs):
+            lines, times = replay(recording, bot, args.seed, workdir)
+            if first_lines is None:
+                first_lines = lines
+            elif lines != first_lines:
+                deterministic = False
+            all_times.setdefault(bot, []).append(times)
+            if len(lines) <= len(recording.turns):
+                print("{} stopped after {} turns, see {}".format(
+                    bot, max(0, len(lines) - 1), os.path.join(workdir, "replay-stderr.log")))
+            print("{:<30} {:>3} {turns:>6} {matching:>9} {setup_ms:>9.1f} {mean_ms:>9.2f} {p50_ms:>9.2f} "
+                  "{p99_ms:>9.2f} {max_ms:>9.2f} {total_s:>8.2f}".format(
+                      bot[-30:], run + 1, **summarize(recording, lines, times)))
+        if args.runs > 1 and not deterministic:
+            print("{} gave different commands between runs with the same seed".format(bot))
+
+    if args.times:
+        with open(args.times, "w") as times_file:
+            json.dump(all_times, times_file)
+
+
+if __name__ == "__main__":
+    main()
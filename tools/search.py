@@ -0,0 +1,261 @@
+"""
+Searches for the parameters a bot plays best with, over a pool of processes.
+
+The bot's script defines a subclass of hlt.parameters.Parameters, e.g.
+ChaosParameters in MyBot.py, with the range of every parameter. Candidate
+configurations are drawn at random from those ranges, the first one being
+the defaults to compare against. Every candidate plays the same seeded
+games against the opponents, by default the bot with its defaults, taking
+turns in the seats; it gets the parameters on its command line with
+--params. A game scores 1 for first place down to 0 for last.
+
+The random search plays every candidate the same number of games. The
+successive halving search plays every candidate a few games, keeps the
+best third (see --eta), plays those until they have three times the games
+and so on until a few are left, so the games go to the candidates that look good.
+
+At the end the search reports the best candidates for every map size and
+player count, and overall, with the parameters they changed.
+
+Usage: python tools/search.py MyBot.py [--strategy halving] [--configs 27] [--games 6] [--sizes 32 48 64]
+       [--players 2 4] [--opponents MyBot.py] [--seed 1] [--workers 8] [--halite ./halite] [--json search.json]
+"""
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import random
+import shlex
+import time
+
+import engine
+import tournament
+
+
+def load_parameters(script):
+    """
+    :param script: The bot's script, with the class after a colon when it has several, e.g. "MyBot.py:ChaosParameters"
+    :return: The bot's Parameters class
+    """
+    path, _, class_name = script.partition(":")
+    module = engine.load_script(path)
+    from hlt.parameters import Parameters
+
+    return engine.script_class(module, Parameters, class_name)
+
+
+def candidates(parameters_class, count, rng):
+    """
+    :return: Count dicts of parameter values, the first being the defaults
+    """
+    configs = [parameters_class().as_dict()]
+    while len(configs) < count:
+        configs.append(parameters_class.sample(rng).as_dict())
+    return configs
+
+
+def candidate_command(script, values):
+    """
+    :return: The command line that starts the bot with the parameters
+    """
+    return "{} --params {}".format(tournament.bot_command(script), shlex.quote(json.dumps(values, sort_keys=True)))
+
+
+def game_settings(games, sizes, player_counts, seed):
+    """
+    :return: The settings of the first games, as dicts with the map size, the player count and the seed
+    """
+    settings = itertools.cycle(itertools.product(player_counts, sizes))
+    return [dict(zip(("player_count", "size"), next(settings)), seed=seed + game) for game in range(games)]
+
+
+def matches(config_id, command, opponents, settings, first_game):
+    """
+    :param config_id: The index of the candidate
+    :param command: The command line of the candidate
+    :param opponents: The command lines of the opponents, taking turns in the other seats
+    :param settings: The settings of every game, from game_settings
+    :param first_game: The first game to play, the ones before it were played in an earlier round
+    :return: The matches for tournament.run_match
+    """
+    scheduled = []
+    for game in range(first_game, len(settings)):
+        players = settings[game]["player_count"]
+        seat = game % players
+        others = [opponents[(game + index) % len(opponents)] for index in range(players - 1)]
+        seats = others[:seat] + [command] + others[seat:]
+        scheduled.append({"game": game, "config": config_id, "seat": seat, "size": settings[game]["size"],
+                          "player_count": players, "seed": settings[game]["seed"], "seats": seats})
+    return scheduled
+
+
+def score(match):
+    """
+    :param match: A match played by tournament.run_match
+    :return: The candidate's score in it, 1 for first place to 0 for last, 0 when the game failed
+    """
+    player = match["players"].get(match["seat"])
+    if player is None:
+        return 0.0
+    return (match["player_count"] - player["rank"]) / (match["player_count"] - 1)
+
+
+def play(scheduled, options, pool, results):
+    """
+    Plays matches on the pool and adds them to results.
+    :param results: Dict of candidate index to the matches it played
+    """
+    done = 0
+    for match in pool.imap_unordered(tournament._run_match, [(match, options) for match in scheduled]):
+        done += 1
+        match["score"] = score(match)
+        results.setdefault(match["config"], []).append(match)
+        if "error" in match:
+            print("[{}/{}] candidate {} game {} failed: {}".format(
+                done, len(scheduled), match["config"], match["game"], match["error"]), flush=True)
+
+
+def mean_score(played):
+    return sum(match["score"] for match in played) / len(played) if played else 0.0
+
+
+def random_search(configs, run, games):
+    """
+    :param configs: The candidates
+    :param run: Called with the candidate indexes and the number of games each is to have played
+    :return: The candidate indexes still in the race, all of them
+    """
+    alive = list(range(len(configs)))
+    run(alive, games)
+    return alive
+
+
+def successive_halving(configs, run, games, eta, results):
+    """
+    Plays every candidate a few games and keeps the best 1/eta for the next
+    round, with eta times the games, until the next round would have one.
+    :param results: Dict of candidate index to the matches it played, which run fills in
+    :return: The candidate indexes of the last round
+    """
+    alive = list(range(len(configs)))
+    while True:
+        run(alive, games)
+        print("{} candidates played {} games, best {:.3f}".format(
+            len(alive), games, max(mean_score(results.get(config, [])) for config in alive)), flush=True)
+        keep = len(alive) // eta
+        if keep <= 1:
+            return alive
+        alive = sorted(alive, key=lambda config: -mean_score(results.get(config, [])))[:keep]
+        games *= eta
+
+
+def report(configs, results, alive, top):
+    """
+    :return: Dict with the best candidates per map size and player count, and overall among the last round
+    """
+    def entry(config, played):
+        halite = [match["players"][match["seat"]]["halite"] for match in played if match["seat"] in match["players"]]
+        return {"config": config, "score": mean_score(played), "games": len(played),
+                "halite": sum(halite) / len(halite) if halite else 0.0, "parameters": configs[config]}
+
+    groups = {}
+    for config, played in results.items():
+        for match in played:
+            groups.setdefault((match["size"], match["player_count"]), {}).setdefault(config, []).append(match)
+    best = {}
+    for (size, players), by_config in sorted(groups.items()):
+        # Candidates dropped early have few games, only compare those with the most
+        most = max(len(played) for played in by_config.values())
+        ranked = sorted((entry(config, played) for config, played in by_config.items() if len(played) == most),
+                        key=lambda item: -item["score"])
+        best["{}x{} {}p".format(size, size, players)] = ranked[:top]
+    overall = sorted((entry(config, results.get(config, [])) for config in alive), key=lambda item: -item["score"])
+    return {"groups": best, "overall": overall[:top]}
+
+
+def _changed(configs, config):
+    defaults = configs[0]
+    changed = {name: value for name, value in configs[config].items() if value != defaults[name]}
+    if not changed:
+        return "defaults"
+    return ", ".join("{}={}".format(name, round(value, 3) if isinstance(value, float) else value)
+                     for name, value in sorted(changed.items()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("bot", help="The bot's script, with its Parameters class after a colon if it has several")
+    parser.add_argument("--strategy", choices=["random", "halving"], default="halving")
+    parser.add_argument("--configs", type=int, default=27, help="Candidates to try, the defaults being one")
+    parser.add_argument("--games", type=int, default=6,
+                        help="Games per candidate, in the first round when halving")
+    parser.add_argument("--eta", type=int, default=3, help="Halving keeps 1/eta of the candidates every round")
+    parser.add_argument("--opponents", nargs="+", help="Bot scripts or command lines, defaults to the bot as it is")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[32, 40, 48, 56, 64])
+    parser.add_argument("--players", type=int, nargs="+", default=[2, 4], choices=[2, 4])
+    parser.add_argument("--seed", type=int, default=1, help="Seeds the candidates and the first game")
+    parser.add_argument("--turn-limit", type=int)
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Games played at the same time")
+    parser.add_argument("--halite", help="Play on this halite binary instead of the local engine")
+    parser.add_argument("--top", type=int, default=3, help="Candidates to report per map size and player count")
+    parser.add_argument("--json", help="Write the candidates, every match and the report to this file")
+    args = parser.parse_args()
+    if args.eta < 2:
+        parser.error("--eta has to be at least 2")
+    # The bots' logs would only slow the games down, and the parameters come from the command line
+    os.environ.setdefault("HALITE_LOG_MODE", "off")
+    os.environ.pop("HALITE_PARAMS", None)
+
+    script = args.bot.partition(":")[0]
+    parameters_class = load_parameters(args.bot)
+    configs = candidates(parameters_class, args.configs, random.Random(args.seed))
+    commands = [candidate_command(script, values) for values in configs]
+    opponents = [tournament.bot_command(bot) for bot in (args.opponents or [script])]
+    options = {"halite": args.halite, "turn_limit": args.turn_limit, "timeouts": True}
+    results = {}
+    played = {}
+    start = time.perf_counter()
+
+    with multiprocessing.Pool(args.workers) as pool:
+        def run(alive, games):
+            settings = game_settings(games, args.sizes, args.players, args.seed)
+            scheduled = []
+            for config in alive:
+                scheduled += matches(config, commands[config], opponents, settings, played.get(config, 0))
+                played[config] = games
+            play(scheduled, options, pool, results)
+
+        if args.strategy == "random":
+            alive = random_search(configs, run, args.games)
+        else:
+            rounds, left = 1, args.configs
+            while left // args.eta > 1:
+                rounds, left = rounds + 1, left // args.eta
+            print("{} candidates, {} rounds, {} left with {} games in the last".format(
+                args.configs, rounds, left, args.games * args.eta ** (rounds - 1)), flush=True)
+            alive = successive_halving(configs, run, args.games, args.eta, results)
+
+    summary = report(configs, results, alive, args.top)
+    total = sum(len(matches_played) for matches_played in results.values())
+    print("\n{} games in {:.0f}s on {} workers".format(total, time.perf_counter() - start, args.workers))
+    for group, ranked in list(summary["groups"].items()) + [("overall", summary["overall"])]:
+        print("\n{}".format(group))
+        for item in ranked:
+            print("  {score:.3f} over {games} games, {halite:.0f} halite: candidate {config}, ".format(**item) +
+                  _changed(configs, item["config"]))
+    failed = sum(1 for matches_played in results.values() for match in matches_played if "error" in match)
+    if failed:
+        print("{} games failed".format(failed))
+    if summary["overall"]:
+        print("\nBest: {} --params {}".format(script, shlex.quote(json.dumps(
+            configs[summary["overall"][0]["config"]], sort_keys=True))))
+    if args.json:
+        with open(args.json, "w") as json_file:
+            json.dump({"candidates": configs, "matches": [match for matches_played in results.values()
+                                                          for match in matches_played],
+                       "report": summary}, json_file)
+
+
+if __name__ == "__main__":
+    main()
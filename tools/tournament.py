@@ -0,0 +1,200 @@
+"""
+Plays a self-play tournament between bots over a pool of processes.
+
+Matches cycle through the map sizes and player counts given, every one on
+its own seed, and the bots take turns in the seats. Every match runs in a
+worker process of its own, one per core by default, on the local engine
+in tools/engine.py or on the halite binary. Each match gets a directory of
+its own for the bots' files. At the end the tournament reports every
+bot's win rate, halite, ships and the time its turns took; the halite
+binary does not report ships or turn times.
+
+Turn times are only comparable when the bots are not fighting over cores,
+so use fewer workers than cores when they matter.
+
+Usage: python tools/tournament.py --bots MyBot.py alternative_bot.py [--games 200] [--sizes 32 40 48 56 64]
+       [--players 2 4] [--seed 1] [--workers 8] [--halite ./halite] [--json results.json]
+"""
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import shlex
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import engine
+
+
+def bot_command(bot):
+    """
+    :param bot: A bot script or the command line that starts a bot
+    :return: The command line, with an absolute path for scripts so it works from any directory
+    """
+    if os.path.isfile(bot):
+        return "{} {}".format(shlex.quote(sys.executable), shlex.quote(os.path.abspath(bot)))
+    return bot
+
+
+def schedule(bots, games, sizes, player_counts, seed):
+    """
+    :return: The matches as dicts with the map size, the seed and the bot in every seat
+    """
+    matches = []
+    settings = itertools.cycle(itertools.product(player_counts, sizes))
+    for game in range(games):
+        players, size = next(settings)
+        seats = [bots[(game + seat) % len(bots)] for seat in range(players)]
+        matches.append({"game": game, "size": size, "seed": seed + game, "seats": seats})
+    return matches
+
+
+def run_match(match, halite=None, turn_limit=None, timeouts=True):
+    """
+    Plays one match in a directory of its own.
+    :param match: A match from schedule
+    :param halite: Path to the halite binary, None for the local engine
+    :return: The match with the results per seat added
+    """
+    workdir = tempfile.mkdtemp(prefix="tournament-")
+    commands = [bot_command(bot) for bot in match["seats"]]
+    start = time.perf_counter()
+    try:
+        if halite is None:
+            result = engine.play(commands, match["size"], match["size"], match["seed"], turn_limit, timeouts, workdir)
+            players = result["players"]
+        else:
+            players = _run_halite(os.path.abspath(halite), commands, match, turn_limit, timeouts, workdir)
+    except Exception as error:
+        return dict(match, error=str(error), players={})
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return dict(match, players=players, time=time.perf_counter() - start)
+
+
+def _run_halite(halite, commands, match, turn_limit, timeouts, workdir):
+    arguments = [halite, "--results-as-json", "--no-replay", "--no-logs",
+                 "--width", str(match["size"]), "--height", str(match["size"]), "--seed", str(match["seed"])]
+    if turn_limit is not None:
+        arguments += ["--turn-limit", str(turn_limit)]
+    if not timeouts:
+        arguments.append("--no-timeout")
+    output = subprocess.run(arguments + commands, cwd=workdir, stdout=subprocess.PIPE, check=True).stdout
+    stats = json.loads(output.decode())["stats"]
+    return {int(player_id): {"rank": player["rank"], "halite": player["score"], "ships": None, "turn_times": []}
+            for player_id, player in stats.items()}
+
+
+def _run_match(arguments):
+    match, options = arguments
+    return run_match(match, **options)
+
+
+def percentile(samples, point):
+    """
+    :param samples: Sorted values
+    :return: The nearest rank percentile
+    """
+    return samples[min(len(samples) - 1, max(0, -(-point * len(samples) // 100) - 1))]
+
+
+def summarize(results):
+    """
+    :param results: The matches played, with their results
+    :return: Dict of bot to its games, wins, win rate, mean halite and ships and turn time percentiles in ms
+    """
+    summary = {}
+    for match in results:
+        winners = set()
+        for seat, player in match["players"].items():
+            bot = match["seats"][seat]
+            stats = summary.setdefault(bot, {"games": set(), "wins": 0, "halite": [], "ships": [], "turn_times": []})
+            stats["games"].add(match["game"])
+            stats["halite"].append(player["halite"])
+            if player.get("ships") is not None:
+                stats["ships"].append(player["ships"])
+            stats["turn_times"].extend(player.get("turn_times", []))
+            if player["rank"] == 1:
+                winners.add(bot)
+        for bot in winners:
+            summary[bot]["wins"] += 1
+
+    report = {}
+    for bot, stats in summary.items():
+        games = len(stats["games"])
+        times = sorted(stats["turn_times"])
+        report[bot] = {
+            "games": games,
+            "wins": stats["wins"],
+            "win_rate": stats["wins"] / games if games else 0.0,
+            "halite": sum(stats["halite"]) / len(stats["halite"]) if stats["halite"] else 0.0,
+            "ships": sum(stats["ships"]) / len(stats["ships"]) if stats["ships"] else None,
+            "turn_p50_ms": percentile(times, 50) * 1000 if times else None,
+            "turn_p99_ms": percentile(times, 99) * 1000 if times else None,
+            "turn_max_ms": times[-1] * 1000 if times else None,
+        }
+    return report
+
+
+def _milliseconds(value):
+    return "{:.1f}".format(value) if value is not None else "-"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--bots", nargs="+", required=True, help="Bot scripts or the command lines that start them")
+    parser.add_argument("--games", type=int, default=200)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[32, 40, 48, 56, 64])
+    parser.add_argument("--players", type=int, nargs="+", default=[2, 4], choices=[2, 4])
+    parser.add_argument("--seed", type=int, default=1, help="The seed of the first game, the others count up")
+    parser.add_argument("--turn-limit", type=int)
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Games played at the same time")
+    parser.add_argument("--halite", help="Play on this halite binary instead of the local engine")
+    parser.add_argument("--no-timeout", action="store_true", help="Let the bots take as long as they want")
+    parser.add_argument("--json", help="Write every match and the summary to this file")
+    args = parser.parse_args()
+    # The bots' logs would only slow the games down
+    os.environ.setdefault("HALITE_LOG_MODE", "off")
+
+    matches = schedule(args.bots, args.games, args.sizes, args.players, args.seed)
+    options = {"halite": args.halite, "turn_limit": args.turn_limit, "timeouts": not args.no_timeout}
+    start = time.perf_counter()
+    results = []
+    with multiprocessing.Pool(args.workers) as pool:
+        for match in pool.imap_unordered(_run_match, [(match, options) for match in matches]):
+            results.append(match)
+            if "error" in match:
+                outcome = "failed: {}".format(match["error"])
+            else:
+                ranked = sorted(match["players"].items(), key=lambda item: item[1]["rank"])
+                outcome = ", ".join("{} {}".format(match["seats"][seat], player["halite"]) for seat, player in ranked)
+            print("[{}/{}] game {} {}x{} seed {}: {}".format(
+                len(results), len(matches), match["game"], match["size"], match["size"], match["seed"], outcome),
+                flush=True)
+
+    results.sort(key=lambda match: match["game"])
+    report = summarize(results)
+    print("\n{} games in {:.0f}s on {} workers".format(len(results), time.perf_counter() - start, args.workers))
+    print("{:<30} {:>6} {:>6} {:>8} {:>10} {:>7} {:>9} {:>9} {:>9}".format(
+        "bot", "games", "wins", "win rate", "halite", "ships", "p50 ms", "p99 ms", "max ms"))
+    for bot, stats in sorted(report.items(), key=lambda item: -item[1]["win_rate"]):
+        print("{:<30} {:>6} {:>6} {:>8.1%} {:>10.0f} {:>7} {:>9} {:>9} {:>9}".format(
+            bot[-30:], stats["games"], stats["wins"], stats["win_rate"], stats["halite"],
+            "{:.1f}".format(stats["ships"]) if stats["ships"] is not None else "-",
+            _milliseconds(stats["turn_p50_ms"]), _milliseconds(stats["turn_p99_ms"]),
+            _milliseconds(stats["turn_max_ms"])))
+
+    failed = sum(1 for match in results if "error" in match)
+    if failed:
+        print("{} games failed".format(failed))
+    if args.json:
+        with open(args.json, "w") as json_file:
+            json.dump({"matches": results, "summary": report}, json_file)
+
+
+if __name__ == "__main__":
+    main()